@@ -42,6 +42,7 @@ class CommandListTemplate:
     def __init__(self, command_list_id):
         self.command_list_id = command_list_id
         self.commands = []
+        self.random_commands = []  # Indexes of commands that use random values
 
     def add_command(self, command_class, *params):
         """Add a command to this template.
@@ -49,22 +50,46 @@ class CommandListTemplate:
         :param command_class: The class object that implements the command.
         :param params: The command's parameters.
         """
+        if hasattr(command_class, 'get_random_values'):
+            self.random_commands.append(len(self.commands))
         self.commands.append((command_class, params))
 
-    def get_commands(self, start):
-        """Return a list of commands (initialised command class instances)
-        constructed from this template.
+    def get_random_values(self, start):
+        """Return a dictionary of random values for the commands in this
+        template that use them, keyed by command index. The values are drawn
+        in the order in which the commands appear in the template.
 
-        :param start: The index of the first command. If `start` is 0, the
-                      entire list of commands is returned. If `start` is N>0,
-                      the first N commands are omitted.
+        :param start: The index of the first command to draw values for.
         """
-        return [cmd_class(*params) for cmd_class, params in self.commands[start:]]
+        random_values = {}
+        for index in self.random_commands:
+            if index >= start:
+                cmd_class, params = self.commands[index]
+                random_values[index] = cmd_class.get_random_values(*params)
+        return random_values
+
+    def get_command(self, index, random_values):
+        """Return a new instance of a command in this template.
+
+        :param index: The index of the command.
+        :param random_values: The random values for the commands in this
+                              template (as returned by
+                              :meth:`get_random_values`).
+        """
+        cmd_class, params = self.commands[index]
+        if index in random_values:
+            return cmd_class(*params, random_values=random_values[index])
+        return cmd_class(*params)
 
 class CommandList:
     """A list of commands built from a :class:`CommandListTemplate`. Maintains
     a command stack from which commands are popped after they have finished
-    executing.
+    executing. Each command is instantiated from the template only when it is
+    about to be added to the stack, so restarting the command list (or jumping
+    within it) involves nothing more than setting the index of the next
+    command, and drawing the random values for any commands that use them
+    (such as :class:`MoveMouse`) in the same order as they would be drawn if
+    every command were instantiated there and then.
 
     :type character: :class:`~pyskool.character.Character`
     :param character: The character to be controlled (the command list owner).
@@ -72,9 +97,12 @@ class CommandList:
     def __init__(self, character):
         self.character = character
         self.stack = []
+        self.stacked = {}          # Number of times each command is on the stack
+        self.uninterruptibles = 0  # Number of uninterruptible commands on the stack
         self.index = None
         self.restart_index = None
         self.template = None
+        self.random_values = None
         self.controlling_command = None
         self.controlling_command_timer = None
         self.subcommand = None
@@ -98,9 +126,9 @@ class CommandList:
           * another command, then add that command to the stack and go to step
             4.
         """
-        if self.stack and self.is_interruptible() and self.controlling_command and self.controlling_command not in self.stack:
+        if self.stack and self.is_interruptible() and self.controlling_command and self.controlling_command not in self.stacked:
             self.add_command(self.controlling_command)
-        if self.subcommand and self.subcommand not in self.stack and self.is_interruptible():
+        if self.subcommand and self.subcommand not in self.stacked and self.is_interruptible():
             self.add_command(self.subcommand)
         while True:
             if self.stack:
@@ -111,19 +139,19 @@ class CommandList:
                 elif subcommand is not command:
                     self.add_command(subcommand)
                 elif self.stack:
-                    self.stack.pop()
+                    self._remove_command(-1)
             else:
                 # Remove any controlling command before moving to the next
                 # command
                 if self.controlling_command:
                     self.controlling_command_timer -= 1
                     if self.controlling_command_timer < 0:
-                        if self.controlling_command in self.stack:
+                        if self.controlling_command in self.stacked:
                             # Finish the controlling command only if it got a
                             # chance to be placed on the stack
                             self.controlling_command.finish()
                         self.controlling_command = None
-                self.add_command(self.commands[self.index])
+                self.add_command(self.template.get_command(self.restart_index + self.index, self.random_values))
                 self.index += 1
 
     def restart(self, index=None):
@@ -135,7 +163,7 @@ class CommandList:
                       0).
         """
         self.index = index or 0
-        self.commands = self.template.get_commands(self.restart_index)
+        self.random_values = self.template.get_random_values(self.restart_index)
 
     def add_command(self, command):
         """Add a command to the stack.
@@ -144,6 +172,22 @@ class CommandList:
         """
         command.character = self.character
         self.stack.append(command)
+        self.stacked[command] = self.stacked.get(command, 0) + 1
+        if not command.is_interruptible():
+            self.uninterruptibles += 1
+
+    def _remove_command(self, index):
+        """Remove a command from the stack.
+
+        :param index: The index of the command in the stack.
+        """
+        command = self.stack.pop(index)
+        if self.stacked[command] > 1:
+            self.stacked[command] -= 1
+        else:
+            del self.stacked[command]
+        if not command.is_interruptible():
+            self.uninterruptibles -= 1
 
     def set_template(self, template):
         """Set the template for this command list. This method is used to
@@ -159,7 +203,7 @@ class CommandList:
         self.subcommand = None
         while self.stack and self.stack[0].is_interruptible():
             self.stack[0].finish()
-            self.stack.pop(0)
+            self._remove_command(0)
         self.restart_index = 0
         self.restart()
 
@@ -220,10 +264,7 @@ class CommandList:
         """Return `False` if the command stack contains an uninterruptible
         command, `True` otherwise.
         """
-        for command in self.stack:
-            if not command.is_interruptible():
-                return False
-        return True
+        return self.uninterruptibles == 0
 
     def set_subcommand(self, command_name, args):
         """Set the subcommand for this command list. The subcommand, if set, is
@@ -538,6 +579,7 @@ class GoTo(Command):
         self.destination = destination
         self.go_one_step = go_one_step
         self.done = False
+        self.route = (None, None, None)
 
     def execute(self):
         """Make a character take the next step towards his destination.
@@ -558,7 +600,7 @@ class GoTo(Command):
         if self.character.is_sitting():
             self.character.get_up()
             return
-        next_staircase = self.character.get_next_staircase(self.destination)
+        next_staircase = self._get_next_staircase()
         if next_staircase:
             if self.character.y == next_staircase.bottom.y:
                 next_x = next_staircase.bottom.x
@@ -579,6 +621,19 @@ class GoTo(Command):
                 self.character.turn()
         self.done = self.go_one_step
 
+    def _get_next_staircase(self):
+        """Return the next staircase the character must ascend or descend in
+        order to reach his destination. The staircase is looked up only when
+        the character has moved onto a different floor or the destination
+        has changed since the last time this method was called.
+        """
+        home_floor = self.character.get_floor()
+        floor, destination, staircase = self.route
+        if floor is not home_floor or destination is not self.destination:
+            staircase = self.character.get_next_staircase(self.destination)
+            self.route = (home_floor, self.destination, staircase)
+        return staircase
+
     def is_GoTo(self):
         """Return whether this command is one of the :class:`GoTo` commands.
 
@@ -2130,16 +2185,39 @@ class MoveMouse(Command):
     :type life_range: 2-tuple
     :param life_range: Minimum and maximum number of sprint sessions the mouse
                        will engage in before dying (if released by Eric).
+    :param random_values: The initial number of sprints, distance of the first
+                          sprint, and number of sprint sessions (as returned by
+                          :meth:`get_random_values`); if `None`, they will be
+                          drawn now.
     """
-    def __init__(self, hide_range, sprints, sprint_range, life_range):
+    def __init__(self, hide_range, sprints, sprint_range, life_range, random_values=None):
         self.hide_range = hide_range
         self.sprints = sprints
         self.sprint_range = sprint_range
         self.life_range = life_range
-        self._reset_sprints()
+        if random_values is None:
+            random_values = self.get_random_values(hide_range, sprints, sprint_range, life_range)
+        self.sprint_count, self.sprint_distance, self.life = random_values
         self.hide_x = -1
         self.hide_delay = None
-        self.life = random.randint(*self.life_range)
+
+    @staticmethod
+    def get_random_values(hide_range, sprints, sprint_range, life_range):
+        """Draw and return the initial number of sprints, distance of the first
+        sprint, and number of sprint sessions for a mouse. These are drawn when
+        the mouse's command list is restarted (see
+        :meth:`CommandListTemplate.get_random_values`), rather than when this
+        command is instantiated.
+
+        :param hide_range: Minimum and maximum delays before the mouse comes
+                           out of hiding.
+        :param sprints: Minimum and maximum number of sprints.
+        :param sprint_range: Minimum and maximum distances of a sprint.
+        :param life_range: Minimum and maximum number of sprint sessions.
+        """
+        sprint_count = random.randint(*sprints)
+        sprint_distance = random.randint(*sprint_range)
+        return sprint_count, sprint_distance, random.randint(*life_range)
 
     def _reset_sprints(self):
         """Reset the number of sprints the mouse will perform before hiding."""
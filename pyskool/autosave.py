@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Richard Dymond (rjdymond@gmail.com)
+#
+# This file is part of Pyskool.
+#
+# Pyskool is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# Pyskool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Pyskool. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Defines the :class:`Autosaver` class.
+"""
+
+import os
+import threading
+import time
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from . import debug
+from . import savegame
+
+#: The suffix of the names of automatically saved games.
+AUTOSAVE_SUFFIX = '-auto.sav'
+
+class Autosaver:
+    """Saves games, both on request and automatically at regular intervals.
+    The state of the game is captured between ticks, but it is compressed and
+    written to disk by a background thread, so that the game does not have to
+    wait for it.
+
+    :param save_game_dir: The directory in which to save games.
+    :param compression: The compression level (0-9).
+    :param interval: The number of ticks between automatic saves (0 = do not
+                     save automatically).
+    :param count: The number of automatically saved games to keep; older ones
+                  are deleted.
+    """
+    def __init__(self, save_game_dir, compression, interval, count):
+        self.save_game_dir = os.path.join(*save_game_dir.split('/'))
+        self.compression = compression
+        self.interval = interval
+        self.count = max(count, 1)
+        self.ticks = 0
+        # Only one game may be waiting to be written; an automatic save that
+        # is due while one is waiting is abandoned, so that the game never
+        # waits for the disk
+        self.queue = queue.Queue(1)
+        self.thread = None
+
+    def tick(self, skool):
+        """Save the game if an automatic save is due. This method is called
+        after each tick of the main loop.
+
+        :type skool: :class:`~pyskool.skool.Skool`
+        :param skool: The skool.
+        """
+        if self.interval > 0:
+            self.ticks += 1
+            if self.ticks >= self.interval:
+                self.ticks = 0
+                self.save(skool, time.strftime('%Y%m%d-%H%M%S') + AUTOSAVE_SUFFIX, True)
+
+    def save(self, skool, fname, auto=False):
+        """Capture the state of the game, to be saved to a file by the
+        background thread.
+
+        :type skool: :class:`~pyskool.skool.Skool`
+        :param skool: The skool.
+        :param fname: The name of the file (relative to the save game
+                      directory).
+        :param auto: Whether this is an automatic save (in which case older
+                     automatically saved games may be deleted).
+        :return: The full path of the file, or `None` if the automatic save
+                 was abandoned because the previous save has not been written
+                 yet.
+        """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._write_saves)
+            self.thread.daemon = True
+            self.thread.start()
+        start = time.time()
+        data = savegame.snapshot(skool)
+        pause = (time.time() - start) * 1000
+        ofile = os.path.join(self.save_game_dir, fname)
+        debug.log('Captured game state for %s in %0.2fms (%i bytes)' % (os.path.abspath(ofile), pause, len(data)))
+        try:
+            self.queue.put((ofile, data, auto), not auto)
+        except queue.Full:
+            debug.log('Unable to save %s: previous save not yet written' % os.path.abspath(ofile))
+            return None
+        return ofile
+
+    def _write_saves(self):
+        """Write saved games to disk until the queue is closed. This method
+        runs in the background thread.
+        """
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    break
+                ofile, data, auto = item
+                try:
+                    if not os.path.isdir(self.save_game_dir):
+                        os.makedirs(self.save_game_dir)
+                    # Write to a temporary file first so that a partly written
+                    # game never appears among the saved games
+                    tmp_file = ofile + '.tmp'
+                    savegame.write(data, tmp_file, self.compression)
+                    if os.path.isfile(ofile):
+                        os.remove(ofile)
+                    os.rename(tmp_file, ofile)
+                    debug.log('Skool saved to %s' % os.path.abspath(ofile))
+                    if auto:
+                        self._rotate()
+                except (IOError, OSError) as e:
+                    debug.log('Unable to save %s: %s' % (os.path.abspath(ofile), e))
+            finally:
+                self.queue.task_done()
+
+    def _rotate(self):
+        """Delete all but the most recent automatically saved games."""
+        autosaves = sorted(f for f in os.listdir(self.save_game_dir) if f.endswith(AUTOSAVE_SUFFIX))
+        for fname in autosaves[:-self.count]:
+            os.remove(os.path.join(self.save_game_dir, fname))
+
+    def flush(self):
+        """Wait until every captured game has been written to disk."""
+        if self.thread:
+            self.queue.join()
+
+    def close(self):
+        """Wait until every captured game has been written to disk, and then
+        stop the background thread.
+        """
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
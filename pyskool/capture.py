@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Richard Dymond (rjdymond@gmail.com)
+#
+# This file is part of Pyskool.
+#
+# Pyskool is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# Pyskool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Pyskool. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Defines the :class:`Capture` class.
+"""
+
+import os
+import threading
+import pygame
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from . import debug
+
+class Capture:
+    """Saves screenshots and recorded frames as PNG files. The contents of the
+    screen are copied when a frame is captured, but the copy is encoded and
+    written to disk by a background thread, so that the game does not have to
+    wait for it.
+
+    :param queue_size: The maximum number of captured frames that may be
+                       waiting to be written; a frame captured while the queue
+                       is full is dropped.
+    """
+    def __init__(self, queue_size):
+        self.queue = queue.Queue(max(queue_size, 1))
+        self.thread = None
+        self.recording_dir = None
+        self.frame_no = 0
+        self.dropped_at_start = 0
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+
+    def save(self, surface, fname):
+        """Capture the contents of a surface, to be saved to a PNG file by the
+        background thread.
+
+        :type surface: `pygame.Surface`
+        :param surface: The surface.
+        :param fname: The name of the file.
+        :return: `True` if the frame was captured, or `False` if it was dropped
+                 because the queue is full.
+        """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._write_frames)
+            self.thread.daemon = True
+            self.thread.start()
+        frame = (fname, surface.get_size(), pygame.image.tostring(surface, 'RGB'))
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.captured += 1
+        return True
+
+    def _write_frames(self):
+        """Write captured frames to disk until the queue is closed. This
+        method runs in the background thread.
+        """
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                break
+            fname, size, data = frame
+            try:
+                pygame.image.save(pygame.image.fromstring(data, size, 'RGB'), fname)
+                self.written += 1
+            except (pygame.error, IOError, OSError) as e:
+                debug.log('Unable to save %s: %s' % (fname, e))
+
+    def start_recording(self, rec_dir):
+        """Start recording frames.
+
+        :param rec_dir: The directory in which to save the frames.
+        """
+        if not os.path.isdir(rec_dir):
+            os.makedirs(rec_dir)
+        self.recording_dir = rec_dir
+        self.frame_no = 0
+        self.dropped_at_start = self.dropped
+
+    def stop_recording(self):
+        """Stop recording frames.
+
+        :return: A 2-tuple, `(captured, dropped)`: the number of frames
+                 captured during the recording, and the number dropped.
+        """
+        self.recording_dir = None
+        return self.frame_no, self.dropped - self.dropped_at_start
+
+    def record(self, surface):
+        """Capture a frame if recording is in progress.
+
+        :type surface: `pygame.Surface`
+        :param surface: The surface containing the frame.
+        """
+        if self.recording_dir:
+            fname = os.path.join(self.recording_dir, 'frame-{:06d}.png'.format(self.frame_no))
+            if self.save(surface, fname):
+                self.frame_no += 1
+
+    def close(self):
+        """Wait until every captured frame has been written to disk."""
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
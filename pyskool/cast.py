@@ -33,6 +33,7 @@ from .water import Water
 from .stinkbomb import Stinkbomb
 from . import ai
 from .lesson import Lesson
+from .spatial import PositionIndex
 from . import graphics
 
 class Cast:
@@ -53,12 +54,15 @@ class Cast:
         self._extract_config(config)
         self.skool = None
         self.sprite_groups = {}
+        self.animatory_states = {}
         self.eric = None
         self.everything = []     # Everything that must be drawn
         self.characters = {}     # Humans
         self.character_list = [] # Ordered list of humans
         self.lines_givers = []   # Characters who can give lines
         self.movables = []       # All computer-controlled things
+        self.people = PositionIndex()  # Humans arranged by location
+        self.head_offsets = set()      # Where humans' heads may be
         self.command_lists = {}
         # Grass configuration
         self.hitters = None
@@ -69,6 +73,8 @@ class Cast:
         # We store animals (mice and frogs) separately so that we can check
         # whether Eric is next to one
         self.animals = []
+        self.animal_index = PositionIndex()
+        self.animal_offsets = set()
         # We store plants separately so that we can check whether Eric is
         # standing on one
         self.plants = []
@@ -185,8 +191,8 @@ class Cast:
         target_y = character.y
         target_direction = -1 * character.direction
         facing_characters = []
-        for c in self.character_list:
-            if (c.x, c.y, c.direction) == (target_x, target_y, target_direction):
+        for c in self.people.get(target_x, target_y):
+            if c.direction == target_direction:
                 facing_characters.append(c)
         return facing_characters
 
@@ -212,13 +218,11 @@ class Cast:
         :param x: The x-coordinate of the location.
         :param y: The x-coordinate of the location.
         """
-        pelletables = [c for c in self.character_list if c.is_pelletable()]
+        pelletables = [c for c in self.people.get(x, y) if c.is_pelletable()]
         for adult in [c for c in pelletables if c.is_adult()]:
-            if (adult.x, adult.y) == (x, y):
-                return adult
-        for child in [c for c in pelletables if not c.is_adult()]:
-            if (child.x, child.y) == (x, y):
-                return child
+            return adult
+        if pelletables:
+            return pelletables[0]
 
     def get_waterable(self, x, y):
         """Return a suitable character to hit with a drop of water at a given
@@ -228,7 +232,7 @@ class Cast:
         :param x: The x-coordinate of the location.
         :param y: The x-coordinate of the location.
         """
-        for c in self.character_list:
+        for c in self._get_heads_at(x, y):
             if c.has_bike_secret() and c.head_at(x, y):
                 return c
 
@@ -240,10 +244,20 @@ class Cast:
         :param x: The x-coordinate of the location.
         :param y: The x-coordinate of the location.
         """
-        for c in self.character_list:
+        for c in self._get_heads_at(x, y):
             if c.has_storeroom_secret() and c.head_at(x, y):
                 return c
 
+    def _get_heads_at(self, x, y):
+        """Return a list of characters whose heads may be at a given location.
+        Each character in the list should be checked with
+        :meth:`~pyskool.character.Character.head_at`.
+
+        :param x: The x-coordinate of the location.
+        :param y: The y-coordinate of the location.
+        """
+        return self.people.get_with_offsets(x, y, self.head_offsets)
+
     def is_home(self, x):
         """Return whether every character is on the 'home' side of a given
         x-coordinate.
@@ -259,8 +273,8 @@ class Cast:
         :type character: :class:`~pyskool.character.Character`
         :param character: The character to check.
         """
-        for c in self.character_list:
-            if c.is_knocked_out() and c.x - 1 <= character.x <= c.x + 1 and character.y == c.y - 1:
+        for c in self.people.get_in_range(character.x - 1, character.x + 1, character.y + 1, character.y + 1):
+            if c.is_knocked_out():
                 return True
 
     def somebody_near_door(self, door):
@@ -268,9 +282,8 @@ class Cast:
 
         :param door: The door to check.
         """
-        for c in self.character_list:
-            if door.x - 2 <= c.x <= door.x + 1 and door.top_y <= c.y <= door.bottom_y:
-                return True
+        if self.people.get_in_range(door.x - 2, door.x + 1, door.top_y, door.bottom_y):
+            return True
 
     def open_desk(self, character, desk):
         """Make a character open a desk. The desk lid will be raised.
@@ -290,9 +303,9 @@ class Cast:
         :param y: The y-coordinate of the location.
         """
         # Assume trippability == pelletability
-        trippables = [c for c in self.character_list if c.is_trippable()]
+        trippables = [c for c in self.people.get(x, y) if c.is_trippable()]
         for trippable in trippables:
-            if trippable is not character and (trippable.x, trippable.y) == (x, y) and trippable.is_deckable():
+            if trippable is not character and trippable.is_deckable():
                 trippable.deck()
 
     def knock_cup(self, cup):
@@ -340,7 +353,7 @@ class Cast:
         sprite_x = self.sprite_width * (state % self.sprite_matrix_width)
         sprite_y = self.sprite_height * (state // self.sprite_matrix_width)
         image = self.sprites.subsurface((sprite_x, sprite_y), (self.sprite_width, self.sprite_height))
-        image.set_colorkey(self.sprite_colorkey)
+        image.set_colorkey(self.sprite_colorkey, rle=True)
         return image
 
     def add_sprite(self, group_id, sprite_id, sprite_index):
@@ -352,9 +365,12 @@ class Cast:
         """
         if group_id not in self.sprite_groups:
             self.sprite_groups[group_id] = [{}, {}]
-        sprite = self._get_animatory_state(sprite_index)
+        if sprite_index not in self.animatory_states:
+            sprite = self._get_animatory_state(sprite_index)
+            self.animatory_states[sprite_index] = (sprite, sprite.flip())
+        sprite, flipped_sprite = self.animatory_states[sprite_index]
         self.sprite_groups[group_id][0][sprite_id] = sprite
-        self.sprite_groups[group_id][1][sprite_id] = sprite.flip()
+        self.sprite_groups[group_id][1][sprite_id] = flipped_sprite
 
     def add_eric(self, character_id, name, sprite_group_id, initial_as, direction, head_xy, flags, bend_over_hand_xy):
         """Add Eric to the cast.
@@ -378,6 +394,7 @@ class Cast:
         self.everything.append(self.eric)
         self.characters[character_id] = self.eric
         self.character_list.append(self.eric)
+        self._index_person(self.eric)
 
     def add_character(self, character_id, name, title, sprite_group_id, initial_as, direction, head_xy, flags):
         """Add a character (other than Eric) to the cast.
@@ -400,10 +417,23 @@ class Cast:
         self.everything.append(c)
         self.characters[character_id] = c
         self.character_list.append(c)
+        self._index_person(c)
         if c.can_give_lines():
             self.lines_givers.append(c)
         self.movables.append(c)
 
+    def _index_person(self, character):
+        """Add a human to the index of characters arranged by location.
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character.
+        """
+        self.people.add(character)
+        if character.head_xy:
+            head_x, head_y = character.head_xy
+            # An adult's head is one row lower when he's knocked over
+            self.head_offsets.update(((head_x, head_y), (head_x, head_y + 1)))
+
     def add_pellet(self, character_id, pellet_id, sprite_group_id, command_list_id, pellet_range, hit_zone, hit_xy):
         """Add a pellet to the cast.
 
@@ -541,9 +571,7 @@ class Cast:
         """
         mouse = animal.Mouse(mouse_id, command_list_id, initial_as, location, sprite_xy, immortal)
         mouse.set_animatory_states(*self.sprite_groups[sprite_group_id])
-        self.everything.append(mouse)
-        self.animals.append(mouse)
-        self.movables.append(mouse)
+        self.insert_mouse(mouse)
         if self.first_mouse is None:
             self.first_mouse = mouse
             self.mouse_sprite_group_id = sprite_group_id
@@ -585,6 +613,8 @@ class Cast:
         frog.long_hop = long_hop
         self.everything.append(frog)
         self.animals.append(frog)
+        self.animal_index.add(frog)
+        self.animal_offsets.add(tuple(sit_xy))
         self.movables.append(frog)
         self.frogs.append(frog)
 
@@ -792,7 +822,7 @@ class Cast:
         :param y: The y-coordinate of the location.
         :return: The animal, or `None` if there is none.
         """
-        for animal in self.animals:
+        for animal in self.animal_index.get_with_offsets(x, y, self.animal_offsets):
             if animal.is_catchable_at(x, y):
                 return animal
 
@@ -826,16 +856,57 @@ class Cast:
         if self.first_mouse is None:
             return
         while num_mice > 0:
-            mouse_id = 'MortalMouse%i' % num_mice
-            initial_as = self.first_mouse.initial_as
-            command_list_id = self.first_mouse.get_command_list_id(None)
             sprite_xy = self.first_mouse.sprite_xy
-            release_coords = (x - sprite_xy[0], y - sprite_xy[1])
-            mouse = self.add_mouse(mouse_id, self.mouse_sprite_group_id, initial_as, release_coords, command_list_id, sprite_xy, False)
-            self._initialise_character(mouse)
-            mouse.set_command_list_template(self.command_lists[command_list_id])
+            mouse = self.add_mortal_mouse('MortalMouse%i' % num_mice, (x - sprite_xy[0], y - sprite_xy[1]))
+            mouse.set_command_list_template(self.command_lists[mouse.get_command_list_id(None)])
             num_mice -= 1
 
+    def create_mortal_mouse(self, mouse_id, location):
+        """Create a mortal mouse (a clone of the first mouse in the cast)
+        without adding it to the game. This method is used when restoring a
+        saved game; see also :meth:`insert_mouse`.
+
+        :param mouse_id: The ID of the mouse.
+        :param location: The mouse's initial location.
+        :return: The mouse.
+        """
+        first_mouse = self.first_mouse
+        command_list_id = first_mouse.get_command_list_id(None)
+        mouse = animal.Mouse(mouse_id, command_list_id, first_mouse.initial_as, location, first_mouse.sprite_xy, False)
+        mouse.set_animatory_states(*self.sprite_groups[self.mouse_sprite_group_id])
+        self._initialise_character(mouse)
+        return mouse
+
+    def add_mortal_mouse(self, mouse_id, location):
+        """Add a mortal mouse (a clone of the first mouse in the cast) to the
+        game. This method is used when Eric releases some mice.
+
+        :param mouse_id: The ID of the mouse.
+        :param location: The mouse's initial location.
+        :return: The mouse.
+        """
+        mouse = self.create_mortal_mouse(mouse_id, location)
+        self.insert_mouse(mouse)
+        return mouse
+
+    def insert_mouse(self, mouse):
+        """Put a mouse into the game. This method is the inverse of
+        :meth:`kill_mouse`.
+
+        :param mouse: The mouse to insert.
+        """
+        self.everything.append(mouse)
+        self.animals.append(mouse)
+        self.animal_index.add(mouse)
+        self.animal_offsets.add(tuple(mouse.sprite_xy))
+        self.movables.append(mouse)
+
+    def get_mortal_mice(self):
+        """Return a list of the mortal mice (released by Eric) that are
+        currently in the game.
+        """
+        return [a for a in self.animals if a.is_mouse() and not a.immortal]
+
     def kill_mouse(self, mouse):
         """Remove a mouse from the game.
 
@@ -844,6 +915,7 @@ class Cast:
         self.everything.remove(mouse)
         self.movables.remove(mouse)
         self.animals.remove(mouse)
+        self.animal_index.remove(mouse)
 
     def scare_musophobes(self, mouse):
         """Make any characters near a mouse respond appropriately.
@@ -871,7 +943,7 @@ class Cast:
         :param y: The y-coordinate to check for heads.
         :return: `True` if the frog hit someone's head, `False` otherwise.
         """
-        for c in self.character_list:
+        for c in self._get_heads_at(x, y):
             if c.has_safe_key() and c.head_at(x, y):
                 self.eric.take_safe_key()
                 return True
@@ -916,7 +988,7 @@ class Cast:
         :param x: The x-coordinate of the location.
         :param y: The x-coordinate of the location.
         """
-        for c in self.character_list:
+        for c in self._get_heads_at(x, y):
             if (c.is_conkerable() or c.is_very_conkerable()) and c.head_at(x, y):
                 return c
 
@@ -960,9 +1032,11 @@ class Cast:
         * print the mouse inventory
         """
         self.sprites.build()
-        for m in self.movables:
-            m.build_images()
-        self.eric.build_images()
+        # Every sprite used by a character (or other movable object) is one of
+        # these animatory state images, so each one need be built only once
+        for sprite, flipped_sprite in self.animatory_states.values():
+            sprite.build()
+            flipped_sprite.build()
         self.eric.print_inventory()
         self.eric.print_mouse_inventory()
 
@@ -1051,13 +1125,14 @@ class Cast:
     #//////////////////////////////////////////////////////////////////////////
     # Lines
     #//////////////////////////////////////////////////////////////////////////
-    def _get_nearby_characters(self, character, candidates, witness):
-        """Return a list of characters chosen from a list of candidates who are
+    def _get_nearby_characters(self, character, is_candidate, witness):
+        """Return a list of characters who are candidates for selection and are
         close enough to a target character to be visible to him.
 
         :type character: :class:`~pyskool.character.Character`
         :param character: The target character.
-        :param candidates: The list of candidates.
+        :param is_candidate: A function that returns whether a character is a
+                             candidate.
         :param witness: If `True`, only choose characters that are facing the
                         target character.
         """
@@ -1066,8 +1141,8 @@ class Cast:
         y0 = character.y - self.lines_giving_range[1]
         y1 = character.y + self.lines_giving_range[1]
         nearby_characters = []
-        for c in candidates:
-            if c is not character and x0 <= c.x <= x1 and y0 <= c.y <= y1 and c.has_line_of_sight_to(character):
+        for c in self.people.get_in_range(x0, x1, y0, y1):
+            if c is not character and is_candidate(c) and c.has_line_of_sight_to(character):
                 if not witness or c.direction * (character.x - c.x) >= 0:
                     nearby_characters.append(c)
         return nearby_characters
@@ -1079,8 +1154,7 @@ class Cast:
         :type character: :class:`~pyskool.character.Character`
         :param character: The target character.
         """
-        adults = [c for c in self.character_list if c.is_adult()]
-        return self._get_nearby_characters(character, adults, True)
+        return self._get_nearby_characters(character, lambda c: c.is_adult(), True)
 
     def get_nearby_lines_givers(self, character):
         """Return a list of lines-givers who are close to and facing a target
@@ -1090,7 +1164,7 @@ class Cast:
         :param character: The target character.
         """
         nearby_lines_givers = []
-        for c in self._get_nearby_characters(character, self.lines_givers, True):
+        for c in self._get_nearby_characters(character, lambda c: c.can_give_lines(), True):
             if c.can_give_lines_now():
                 nearby_lines_givers.append(c)
         return nearby_lines_givers
@@ -1102,8 +1176,7 @@ class Cast:
         :type character: :class:`~pyskool.character.Character`
         :param character: The target character.
         """
-        lines_recipients = [c for c in self.character_list if c.can_receive_lines()]
-        candidates = self._get_nearby_characters(character, lines_recipients, False)
+        candidates = self._get_nearby_characters(character, lambda c: c.can_receive_lines(), False)
         if len(candidates) > 0:
             nearest = candidates[0]
             for c in candidates[1:]:
@@ -1207,9 +1280,8 @@ class Cast:
         :param x: The x-coordinate of the location.
         :param y: The y-coordinate of the location.
         """
-        for c in self.character_list:
-            if (c.x, c.y) == (x, y):
-                c.y -= 1
+        for c in self.people.get(x, y):
+            c.y -= 1
 
     def plant(self, character):
         """Return the plant that a character is standing on, or `None` if he's
@@ -1229,6 +1301,5 @@ class Cast:
         :param x: The x-coordinate of the location.
         :param y: The y-coordinate of the location.
         """
-        for c in self.character_list:
-            if (c.x, c.y) == (x, y):
-                c.fall_off_plant()
+        for c in self.people.get(x, y):
+            c.fall_off_plant()
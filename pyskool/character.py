@@ -35,7 +35,24 @@ from .lesson import QAGenerator
 from . import sound
 from . import debug
 
-class Character:
+class Coordinate(object):
+    """The x- or y-coordinate of a character. Setting the coordinate updates
+    the :class:`~pyskool.spatial.PositionIndex` (if any) that the character
+    belongs to. There is no `__get__` method, so reading the coordinate is as
+    fast as reading any other attribute.
+
+    :param name: The name of the coordinate (`'x'` or `'y'`).
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __set__(self, character, value):
+        character.__dict__[self.name] = value
+        index = character.__dict__.get('position_index')
+        if index:
+            index.update(character)
+
+class Character(object):
     """Base class for anything in the game that moves.
 
     :param character_id: Unique ID.
@@ -44,7 +61,11 @@ class Character:
                     when he's standing upright (used for collision detection).
     :param flags: Character flags.
     """
+    x = Coordinate('x')
+    y = Coordinate('y')
+
     def __init__(self, character_id, name, head_xy=None, flags=''):
+        self.position_index = None
         self.character_id = character_id
         self.name = name
         self.head_xy = head_xy
@@ -68,6 +89,7 @@ class Character:
         self.command_lists = {}
         self.sit_down_messages = []
         self.bubble = None
+        self.speech_bubble = None
         self.blackboard_messages = []
         self.qa_generator = None
         self.wiping_board = False
@@ -96,6 +118,7 @@ class Character:
     def __getstate__(self):
         d = self.__dict__.copy()
         d['bubble'] = None
+        d['speech_bubble'] = None
         return d
 
     def is_home(self, x):
@@ -309,13 +332,16 @@ class Character:
             bubble_x = 8 * ((self.x + 1) // 8)
             bubble_y = self.y - (3 if self.is_adult() or self.is_standing() else 2)
             self.bubble = [bubble_x, bubble_y, None]
+            self.speech_bubble = None
         lip_pos = (self.x + 1) % 8
-        self.bubble[2], done = self.screen.get_bubble(words, lip_pos, shift)
+        self.speech_bubble = self.screen.get_speech_bubble(words, lip_pos, self.speech_bubble)
+        self.bubble[2], done = self.speech_bubble.show(shift)
         return done
 
     def remove_bubble(self):
         """Remove the character's speech bubble."""
         self.bubble = None
+        self.speech_bubble = None
 
     def get_blackboard(self):
         """Return the blackboard in the room in which the character is
@@ -765,6 +791,7 @@ class Character:
         self.vertical_direction = 0
         self.animatory_state = self.initial_as
         self.bubble = None
+        self.speech_bubble = None
         self.wiping_board = False
         self.action = 0
         self.speed = 1
@@ -1196,15 +1223,6 @@ class Character:
         as_dict = self.as_dict_R if self.direction > 0 else self.as_dict_L
         return (self.x, self.y, as_dict[self.animatory_state])
 
-    def build_images(self):
-        """Build the animatory state images for the character. This method is
-        called after rescaling the screen or loading a saved game.
-        """
-        for image in self.as_dict_L.values():
-            image.build()
-        for image in self.as_dict_R.values():
-            image.build()
-
     #//////////////////////////////////////////////////////////////////////////
     # Eric
     #//////////////////////////////////////////////////////////////////////////
@@ -1480,6 +1498,7 @@ class Character:
         if not (self.message_box_coords and prev_coords):
             self.message_box_coords = self._get_head_coords()
         x, y = self.message_box_coords
+        self.skool.draw_skipped_frame()
         self.screen.print_message_box(x, y, message, ink, paper)
         self.skool.locked = pre_resume is not None
         self.skool.play_sound(sound_id, pre_resume=pre_resume, pre_resume_args=pre_resume_args)
@@ -20,24 +20,30 @@ Defines the :class:`Game` class.
 """
 
 import sys
-import gzip
 import os
-import pickle
 import pygame
 import random
 import time
+import zlib
 
 from .cast import Cast
 from .character import Character
 from .skool import Skool
-from .graphics import Screen, Gallery
-from .sound import Beeper
-from .input import Keyboard
+from .graphics import Screen, HeadlessScreen, Gallery
+from .autosave import Autosaver
+from .capture import Capture
+from .rewind import Rewinder
+from .sound import Beeper, HeadlessBeeper, ReplayBeeper
+from .input import Keyboard, HeadlessKeyboard, ReplayKeyboard
+from .replay import Recorder, Player
+from .trace import Tracer
 from .iniparser import IniParser
 from . import skoolbuilder
+from . import savegame
 from . import keys
 from . import items
 from . import debug
+from . import user_dir
 
 #: Menu operation: Resume.
 RESUME = 'RESUME'
@@ -71,10 +77,36 @@ class Game:
     :param sav_file: A file from which to restore a saved game.
     """
     def __init__(self, ini_file, images_dir, sounds_dir, ini_dir, options, version, sav_file):
+        record_file = getattr(options, 'record', None)
+        replay_file = getattr(options, 'replay', None)
+        trace_file = getattr(options, 'trace', None)
+        self.player = None
+        self.recorder = None
+        self.tracer = None
+        seed = getattr(options, 'seed', None)
+        if replay_file:
+            try:
+                self.player = Player(replay_file)
+            except (IOError, ValueError, zlib.error) as e:
+                debug.error('Unable to replay %s: %s' % (replay_file, e))
+                sys.exit(1)
+            seed = self.player.seed
+        elif record_file and seed is None:
+            seed = random.randrange(1 << 32)
+        if seed is not None:
+            # The characters' decisions depend on the random number generator,
+            # so a game can be replayed only if it is seeded the same way
+            random.seed(seed)
+        self.headless = options.headless or self.player is not None
+        self.max_ticks = options.ticks
+        if self.headless:
+            # Make sure SDL neither opens a window nor uses the sound card
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
         # Reduce latency in Pygame 1.8+
         pygame.mixer.pre_init(44100, -16, 1, 1024)
         pygame.init()
-        if pygame.mixer.get_init() is None:
+        if pygame.mixer.get_init() is None and not self.headless:
             sys.stdout.write("WARNING: pygame.mixer failed to initialise; there will be no sound\n")
 
         parser = IniParser(ini_file)
@@ -97,37 +129,83 @@ class Game:
         self.menu = None
 
         builder = skoolbuilder.SkoolBuilder(ini_dir)
-        builder.sections['ExtraConfig'] = options.config or []
+        extra_config = options.config or []
+        if self.player:
+            # Parameters set on the command line when the game was recorded
+            # come first, so that any set now (e.g. to switch an optimisation
+            # off) take precedence
+            builder.sections['ExtraConfig'] = self.player.config + extra_config
+        else:
+            builder.sections['ExtraConfig'] = extra_config
         config = builder.get_config('[A-Za-z]+Config')
         self.scale = options.scale or config.get('Scale', 2)
         self.cheat = options.cheat or config.get('Cheat', 0)
         self.quick_start = options.quick_start or config.get('QuickStart', 0)
+        if self.player:
+            self.cheat = self.player.cheat
+            self.quick_start = self.player.quick_start
         self.ring_bell = not self.quick_start
         self.confirm_close = config.get('ConfirmClose', 0)
         self.confirm_quit = config.get('ConfirmQuit', 1)
-
-        if sav_file:
-            if os.path.isfile(sav_file):
-                self.quick_start = True
-                self.ring_bell = True
-                self._load(sav_file)
-                return
-            debug.log('Unable to restore from %s: file not found' % sav_file)
+        self.capture = Capture(config.get('CaptureQueueSize', 32))
 
         image_set = config.get('ImageSet', 'original')
-        gallery = Gallery(images_dir, image_set, self.scale, builder.get_config(skoolbuilder.IMAGES))
+        image_cache_dir = config.get('ImageCacheDir', os.path.join(user_dir, 'cache'))
+        image_cache_size = config.get('ImageCacheSize', 2)
+        gallery = Gallery(images_dir, image_set, self.scale, builder.get_config(skoolbuilder.IMAGES), image_cache_dir, image_cache_size)
         title_prefix = 'Pyskool %s: ' % version
-        self.screen = Screen(config, gallery, title_prefix)
-        self.beeper = Beeper(sounds_dir, config)
+        if self.player:
+            self.screen = HeadlessScreen(config, gallery, title_prefix)
+            self.beeper = ReplayBeeper(sounds_dir, config, self.player)
+        elif self.headless:
+            self.screen = HeadlessScreen(config, gallery, title_prefix)
+            self.beeper = HeadlessBeeper(sounds_dir, config)
+        else:
+            self.screen = Screen(config, gallery, title_prefix)
+            self.beeper = Beeper(sounds_dir, config)
+        self.screen.capture = self.capture
         self.cast = Cast(config, self.screen, gallery)
         self.skool = Skool(config, self.screen, self.beeper, self.cast, gallery)
         builder.build_skool(self.skool)
-        self.keyboard = Keyboard()
+        fingerprint = savegame.get_fingerprint(self.skool)
+        rewind_interval = max(config.get('RewindInterval', 10), 1)
+        rewind_length = config.get('RewindLength', 10) * self.screen.fps // rewind_interval
+        if self.player:
+            if not self.player.rewind:
+                # The recorded game could not be rewound, so there is no need
+                # to capture its state for rewinding now
+                rewind_length = 0
+        elif self.headless:
+            # Nobody can press the rewind key in headless mode
+            rewind_length = 0
+        self.rewinder = Rewinder(rewind_length, rewind_interval)
+        if self.player:
+            if fingerprint != self.player.fingerprint:
+                debug.error('Unable to replay %s: recorded with a different skool' % replay_file)
+                sys.exit(1)
+            self.keyboard = ReplayKeyboard(self.player)
+        else:
+            if record_file:
+                self.recorder = Recorder(record_file, seed, fingerprint, self.quick_start, self.cheat, rewind_length > 0, extra_config)
+                self.beeper.recorder = self.recorder
+                debug.log('Recording to %s' % record_file)
+            self.keyboard = HeadlessKeyboard(self.recorder) if self.headless else Keyboard(self.recorder)
         self.skool.initialise_cast(self.keyboard)
         self.screen.initialise_column(self.skool.get_width(), self.cast.eric.x)
         self.screen.setup()
         self.skool.update_score_box()
         self._build_menus()
+        self.autosaver = Autosaver(self.skool.save_game_dir, self.skool.save_game_compression, config.get('AutosaveInterval', 0), config.get('AutosaveCount', 5))
+        if trace_file:
+            self.tracer = Tracer(trace_file)
+
+        if sav_file:
+            if os.path.isfile(sav_file):
+                if self._load(sav_file):
+                    self.quick_start = True
+                    self.ring_bell = True
+            else:
+                debug.log('Unable to restore from %s: file not found' % sav_file)
 
     def _build_menus(self):
         """Build the menus."""
@@ -154,7 +232,7 @@ class Game:
             status = 'Saved %s' % sav_file
         elif operation == LOAD:
             sav_file = self._load_last()
-            status = 'Loaded %s' % sav_file if sav_file else 'No saved games found'
+            status = 'Loaded %s' % sav_file if sav_file else 'No saved game loaded'
             self.skool.draw(False)
             refresh = True
         elif operation == SCALE_UP:
@@ -162,14 +240,14 @@ class Game:
             self.skool.restore()
             self.skool.draw(False)
             refresh = True
-            status = 'Scale set to %i' % self.screen.scale
+            status = 'Scale set to %i' % self.screen.display_scale
             self._build_menu_images()
         elif operation == SCALE_DOWN:
             if self.screen.scale_down():
                 self.skool.restore()
                 self.skool.draw(False)
                 refresh = True
-                status = 'Scale set to %i' % self.screen.scale
+                status = 'Scale set to %i' % self.screen.display_scale
                 self._build_menu_images()
         elif operation == TOGGLE_FULLSCREEN:
             pygame.display.toggle_fullscreen()
@@ -212,41 +290,27 @@ class Game:
 
         :param fname: The name of the file to save to.
         """
-        save_game_dir = os.path.join(*self.skool.save_game_dir.split('/'))
-        if not os.path.isdir(save_game_dir):
-            os.makedirs(save_game_dir)
-        ofile = os.path.join(save_game_dir, fname)
-        f = gzip.open(ofile, 'wb', self.skool.save_game_compression)
-        pickle.dump(self.skool, f)
-        f.close()
-        debug.log('Skool saved to %s' % os.path.abspath(ofile))
+        self.autosaver.save(self.skool, fname)
 
     def _load(self, fname):
         """Load a saved game.
 
         :param fname: The name of the file to load from.
+        :return: `True` if the game was loaded, `False` otherwise.
         """
-        scale = self.screen.scale if self.screen else self.scale
         start = time.time()
-        f = gzip.open(fname, 'rb')
-        self.skool = pickle.load(f)
-        f.close()
-
-        # Restore instance variables
-        self.screen = self.skool.screen
-        self.beeper = self.skool.beeper
-        self.cast = self.skool.cast
-        self.keyboard = self.cast.eric.keyboard
-
-        # Perform necessary post-load tasks
-        if scale:
-            self.screen.scale = scale
-        self.skool.beeper.restore(self.sounds_dir)
-        self.skool.gallery.restore(self.images_dir)
+        try:
+            savegame.load(self.skool, fname)
+        except (IOError, ValueError, zlib.error) as e:
+            debug.log('Unable to load %s: %s' % (os.path.abspath(fname), e))
+            return False
+        # Discard any images that have been drawn on (such as blackboards) so
+        # that they are rebuilt from the saved state
+        self.skool.gallery.reset(self.skool.gallery.scale)
         self.skool.restore()
-        self._build_menus()
-
+        self.rewinder.reset()
         debug.log('Skool loaded from %s in %0.2fs' % (os.path.abspath(fname), time.time() - start))
+        return True
 
     def _save_game(self):
         """Save the game."""
@@ -256,6 +320,7 @@ class Game:
 
     def _load_last(self):
         """Load the most recently saved game."""
+        self.autosaver.flush()
         save_game_dir = os.path.abspath(self.skool.save_game_dir)
         if not os.path.isdir(save_game_dir):
             debug.log("Cannot load games from '%s': directory not found" % save_game_dir)
@@ -266,8 +331,18 @@ class Game:
             return
         sav_files.sort()
         sav_file = sav_files[-1]
-        self._load(os.path.join(save_game_dir, sav_file))
-        return sav_file
+        if self._load(os.path.join(save_game_dir, sav_file)):
+            return sav_file
+
+    def _rewind(self):
+        """Step the game back to the most recently captured state."""
+        start = time.time()
+        if self.rewinder.rewind(self.skool):
+            self.skool.refresh()
+            states, size = self.rewinder.get_size()
+            debug.log('Rewound in %0.2fms (%i states, %i bytes left in buffer)' % ((time.time() - start) * 1000, states, size))
+        else:
+            debug.log('Cannot rewind: no states left in buffer')
 
     def _check_cheat_keys(self):
         """Check whether any cheat keys were pressed, and take appropriate
@@ -365,13 +440,39 @@ class Game:
         if not os.path.isdir(scrshot_dir):
             os.makedirs(scrshot_dir)
         img_path = os.path.join(scrshot_dir, img_fname)
-        self.screen.take_screenshot(img_path)
-        self.screenshot += 1
-        debug.log('Took screenshot: {}'.format(img_path))
+        if self.screen.take_screenshot(img_path):
+            self.screenshot += 1
+            debug.log('Took screenshot: {}'.format(img_path))
+        else:
+            debug.log('Screenshot dropped: too many frames waiting to be saved')
+
+    def _toggle_recording(self):
+        """Start or stop recording frames."""
+        if self.capture.recording_dir:
+            rec_dir = self.capture.recording_dir
+            captured, dropped = self.capture.stop_recording()
+            debug.log('Stopped recording to {}: {} frames captured, {} dropped'.format(rec_dir, captured, dropped))
+        else:
+            rec_dir = os.path.join(self.skool.screenshot_dir, time.strftime('%Y%m%d-%H%M%S'))
+            self.capture.start_recording(rec_dir)
+            debug.log('Started recording to {}'.format(rec_dir))
 
     def play(self):
         """Start the game and enter the main loop."""
-        self.clock = pygame.time.Clock()
+        try:
+            if self.headless:
+                self._play_headless()
+            else:
+                self._play()
+        finally:
+            if self.recorder:
+                self.recorder.close()
+            if self.tracer:
+                self.tracer.close()
+
+    def _play(self):
+        """Run the main loop until the game is quit."""
+        self.clock = GameClock()
         self.paused = False
 
         while True:
@@ -384,10 +485,51 @@ class Game:
 
             while not self.skool.game_over:
                 if self._main_loop():
+                    font = self.screen.font
+                    debug.log('Text cache: %i hits, %i misses' % (font.hits, font.misses))
+                    debug.log('Frames dropped: %i' % self.clock.dropped)
+                    self.capture.close()
+                    capture = self.capture
+                    debug.log('Capture: %i frames saved, %i dropped' % (capture.written, capture.dropped))
+                    self.autosaver.close()
+                    debug.log('Rewind buffer: %i states, %i bytes' % self.rewinder.get_size())
                     return
 
             self.skool.reinitialise()
 
+    def _play_headless(self):
+        """Run the main loop without a display, without sound, and as fast as
+        possible, for the number of ticks specified by the ``--ticks`` command
+        line option (or until the game ends if that number is 0), and then
+        report how many ticks per second were achieved. When a recorded game
+        is being replayed, the main loop runs until the end of the recording
+        instead of the end of the game.
+        """
+        self.clock = HeadlessClock()
+        self.paused = False
+        self.scroll = 0
+        ticks = 0
+        start = time.time()
+        while self.max_ticks < 1 or ticks < self.max_ticks:
+            if self.player and self.player.finished:
+                break
+            if self.skool.game_over:
+                if not self.player:
+                    break
+                self.skool.reinitialise()
+                self.scroll = 0
+                self.quick_start = False
+            if not self.quick_start:
+                self.skool.scroll_on(self.clock)
+                self.quick_start = True
+            if self._main_loop():
+                break
+            ticks += 1
+        elapsed = time.time() - start
+        self.autosaver.close()
+        rate = ticks / elapsed if elapsed > 0 else 0
+        sys.stdout.write('Ran %i ticks in %0.2fs (%i ticks/s)\n' % (ticks, elapsed, rate))
+
     def _main_loop(self):
         """The main loop of the game. The following things are done in the main
         loop:
@@ -398,6 +540,21 @@ class Game:
         * shut any auto-shutting doors that need shutting
         * update the screen
         * scroll the screen if necessary
+        * save the game if an automatic save is due
+        * capture the state of the game for rewinding if it is due
+        * redraw any panels (e.g. the score box) that have changed
+        * write the state of the game to the trace file (if tracing)
+
+        :return: `True` if the game is quitting, `False` otherwise.
+        """
+        quitting = self._run_tick()
+        self.screen.update_panels()
+        if self.tracer:
+            self.tracer.tick(self.skool)
+        return quitting
+
+    def _run_tick(self):
+        """Run one pass through the main loop, except for redrawing the panels.
 
         :return: `True` if the game is quitting, `False` otherwise.
         """
@@ -406,8 +563,12 @@ class Game:
             return False
 
         if self.keyboard.was_pressed(keys.SCREENSHOT, force_check=True):
+            self.skool.draw_skipped_frame()
             self._take_screenshot()
 
+        if self.keyboard.was_pressed(keys.RECORD, force_check=True):
+            self._toggle_recording()
+
         if self.menu:
             return self._handle_menu()
 
@@ -421,6 +582,7 @@ class Game:
                 return True
             show_quit_menu = True
         if show_quit_menu:
+            self.skool.draw_skipped_frame()
             self.menu = self.menus['Quit']
             self.menu.reset()
             self.screen.draw_menu(self.menu)
@@ -429,6 +591,7 @@ class Game:
 
         self.paused ^= self.keyboard.was_pressed(keys.PAUSE, force_check=True)
         if self.paused:
+            self.skool.draw_skipped_frame()
             self.beeper.pause()
             self.clock.tick(10)
             self.keyboard.pump()
@@ -464,10 +627,13 @@ class Game:
 
         self.skool.auto_shut_doors()
         self.clock.tick(self.screen.fps * self.speed)
-        self.skool.draw()
+        self.skool.draw(skip=not self.clock.frame_due(self.screen.display_fps, self.screen.max_frame_skip))
         self.skool.scroll(self.scroll, self.clock)
+        self.autosaver.tick(self.skool)
+        self.rewinder.tick(self.skool)
 
         if self.keyboard.was_pressed(keys.MENU, force_check=True):
+            self.skool.draw_skipped_frame()
             self.menu = self.menus['Main']
             self.menu.reset()
             self.screen.draw_menu(self.menu)
@@ -475,9 +641,87 @@ class Game:
             self._save_game()
         elif self.keyboard.was_pressed(keys.LOAD, force_check=True):
             self._load_last()
+        elif self.keyboard.was_pressed(keys.REWIND):
+            self._rewind()
 
         return False
 
+class GameClock:
+    """A clock that runs the main loop at a fixed number of ticks per second.
+    If the game falls behind, the clock does not wait until it has caught up
+    again, and it skips drawing frames in the meantime. Frames are also
+    skipped when the game is running faster than the display rate.
+    """
+    def __init__(self):
+        self.framerate = 0
+        self.due = None
+        self.lag = 0
+        self.frame_credit = 1
+        self.skipped = 0
+        self.dropped = 0
+
+    def tick(self, framerate=0):
+        """Wait until the next tick is due. The schedule is restarted if the
+        frame rate has changed since the previous tick, or if the game has
+        fallen more than a second behind.
+
+        :param framerate: The desired number of ticks per second (0 = do not
+                          wait at all).
+        :return: The number of milliseconds for which the clock waited.
+        """
+        now = pygame.time.get_ticks()
+        if framerate <= 0 or framerate != self.framerate or self.due is None or now - self.due > 1000:
+            self.framerate = framerate
+            self.due = now
+        else:
+            self.due += 1000.0 / framerate
+        self.lag = now - self.due
+        if self.lag < 0:
+            pygame.time.wait(int(-self.lag))
+            return int(-self.lag)
+        return 0
+
+    def frame_due(self, max_fps, max_skip):
+        """Return whether a frame should be drawn after the current tick.
+
+        :param max_fps: The maximum number of frames per second to draw (0 =
+                        no maximum).
+        :param max_skip: The maximum number of consecutive frames that may be
+                         dropped while the game is behind schedule.
+        """
+        if 0 < max_fps < self.framerate:
+            self.frame_credit = min(self.frame_credit + float(max_fps) / self.framerate, 1)
+            if self.frame_credit < 1:
+                return False
+        else:
+            self.frame_credit = 1
+        if self.framerate > 0 and self.lag >= 1000.0 / self.framerate and self.skipped < max_skip:
+            self.skipped += 1
+            self.dropped += 1
+            return False
+        self.skipped = 0
+        self.frame_credit -= 1
+        return True
+
+class HeadlessClock:
+    """A stand-in for :class:`GameClock` that never waits. It is used when the
+    game is run in headless mode.
+    """
+    def tick(self, framerate=0):
+        """Return immediately.
+
+        :param framerate: The desired frame rate (ignored).
+        """
+        return 0
+
+    def frame_due(self, max_fps, max_skip):
+        """Return `True` (every frame is drawn in headless mode).
+
+        :param max_fps: The maximum frame rate (ignored).
+        :param max_skip: The maximum number of frames to skip (ignored).
+        """
+        return True
+
 class Menu:
     """The in-game menu.
 
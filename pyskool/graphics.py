@@ -20,6 +20,8 @@ Classes concerned with the screen and drawing things on it.
 """
 
 import os
+import hashlib
+from collections import OrderedDict
 import pygame
 
 from . import debug
@@ -70,6 +72,8 @@ class Screen(object):
         self.title = title_prefix + config.get('Name', 'Unknown Skool Game')
         self.icon_fname = config.get('Icon', 'icon.png')
         self.fps = config.get('GameFps', 20)
+        self.display_fps = config.get('DisplayFps', self.fps)
+        self.max_frame_skip = config.get('MaxFrameSkip', 4)
         self.mode = config.get('GraphicsMode', 1)
         self.background = config.get('Background', 2)
         self.scroll_fps = config.get('ScrollFps', 20)
@@ -96,6 +100,8 @@ class Screen(object):
         self.scroll_right_offset = config.get('ScrollRightOffset', 9)
         self.scroll_left_offset = config.get('ScrollLeftOffset', 10)
         self.scroll_columns = config.get('ScrollColumns', 8)
+        self.blocking_scroll = config.get('BlockingScroll', 1)
+        self.pending_scroll = (0, 0)
         self.bubble_lip_size = config.get('SpeechBubbleLipSize', (1, 1))
         self.speech_bubble_size = config.get('SpeechBubbleSize', (8, 3))
         self.speech_bubble_ink = config.get('SpeechBubbleInk', (0, 0, 0))
@@ -103,8 +109,18 @@ class Screen(object):
         self.speech_bubble_inset = config.get('SpeechBubbleInset', (4, 4))
         self.skool_colorkey = config.get('SkoolInkKey', (255, 255, 255))
         self.initial_column = config.get('InitialColumn', -1)
-
-        pygame.display.set_mode(self.scale_coords((self.width, self.height)))
+        self.dirty_rects = config.get('DirtyRects', 1)
+        self.native = config.get('NativeResolution', 0)
+        self.zoom = 1
+        if self.native:
+            self.zoom = self.scale
+            self.scale = 1
+        self.capture = None
+        self.panels = {}
+        self.message_box_backgrounds = {}
+        self._reset_frame()
+
+        self._set_mode()
         self.message_box = gallery.get_image(MESSAGE_BOX)
         self.message_box.set_colorkey(config.get('MessageBoxColour', (197, 0, 0)))
         self.lesson_box = gallery.get_image(LESSON_BOX)
@@ -113,19 +129,56 @@ class Screen(object):
         self.bubble = gallery.get_image(SPEECH_BUBBLE)
         bubble_lip_coords = config.get('SpeechBubbleLipCoords', (8, 0))
         self.bubble_lip = self.bubble.subsurface(bubble_lip_coords, self.bubble_lip_size)
-        self.font = Font(gallery.get_image(FONT), config.get('FontInk', (0, 1, 2)), config.get('FontPaper', (255, 254, 253)))
+        self.font = Font(gallery.get_image(FONT), config.get('FontInk', (0, 1, 2)), config.get('FontPaper', (255, 254, 253)), config.get('TextCacheSize', 64))
 
     def __getstate__(self):
         d = self.__dict__.copy()
         d['screen'] = None
+        d['capture'] = None
+        d['message_box_backgrounds'] = {}
+        d['scratch'] = None
+        d['composite'] = None
+        d['drawn_panels'] = {}
+        d['sprites'] = {}
+        d['dirty'] = []
         return d
 
+    def _reset_frame(self):
+        """Forget what was drawn in the previous frame, so that the whole play
+        area is redrawn in the next frame.
+        """
+        self.redraw = True
+        self.drawn_column = None
+        self.sprites = {}
+        self.dirty = []
+        self.scratch = None
+        self.composite = None
+        self.visible_area = None
+        self.drawn_panels = {}
+
     def _get_scale(self):
         return self.gallery.scale
     def _set_scale(self, value):
         self.gallery.scale = value
     scale = property(_get_scale, _set_scale)
 
+    def _get_display_scale(self):
+        return self.scale * self.zoom
+    def _set_display_scale(self, value):
+        if self.native:
+            self.zoom = value
+        else:
+            self.scale = value
+    #: The scale at which the game appears on the display. This is the same as
+    #: :attr:`scale` unless each frame is drawn at scale 1 and then scaled up
+    #: (see the ``NativeResolution`` parameter).
+    display_scale = property(_get_display_scale, _set_display_scale)
+
+    def _set_mode(self):
+        """Set the size of the display."""
+        width, height = self.scale_coords((self.width, self.height))
+        pygame.display.set_mode((self.zoom * width, self.zoom * height))
+
     def setup(self, set_mode=False):
         """Set up the following things:
 
@@ -138,11 +191,16 @@ class Screen(object):
         :param set_mode: If `True`, the size of the screen will be set.
         """
         if set_mode:
-            pygame.display.set_mode(self.scale_coords((self.width, self.height)))
+            self._set_mode()
         pygame.display.set_caption(self.title)
         if os.path.isfile(self.icon_fname):
             pygame.display.set_icon(pygame.image.load(self.icon_fname).convert())
         self.screen = pygame.display.get_surface()
+        if self.zoom > 1:
+            # Draw everything in a frame buffer at scale 1, and scale up only
+            # those parts of it that are updated on the display
+            self.screen = pygame.Surface(self.scale_coords((self.width, self.height)), 0, self.screen)
+        self._reset_frame()
         self.screen.fill(self.background)
         self._build_images()
         self.screen.blit(self.logo.surface, self.scale_coords(self.logo_coords))
@@ -158,7 +216,8 @@ class Screen(object):
 
     def _rescale(self):
         """Redraw the screen after a scale change."""
-        pygame.display.set_mode(self.scale_coords((self.width, self.height)))
+        self._set_mode()
+        self._reset_frame()
         self._build_images()
 
     def _build_images(self):
@@ -173,6 +232,7 @@ class Screen(object):
         * font
         """
         self.message_box.build()
+        self.message_box_backgrounds = {}
         self.lesson_box.build()
         self.score_box.build()
         self.logo.build()
@@ -182,14 +242,22 @@ class Screen(object):
 
     def scale_up(self):
         """Increase the scale factor by 1, and redraw the screen."""
-        self.gallery.scale_up()
+        if self.native:
+            self.zoom += 1
+        else:
+            self.gallery.scale_up()
         self._rescale()
 
     def scale_down(self):
         """Decrease the scale factor by 1 (if it is greater than 1), and redraw
         the screen.
         """
-        if self.gallery.scale_down():
+        if self.native:
+            if self.zoom > 1:
+                self.zoom -= 1
+                self._rescale()
+                return True
+        elif self.gallery.scale_down():
             self._rescale()
             return True
         return False
@@ -216,6 +284,7 @@ class Screen(object):
     def reinitialise(self):
         """Reinitialise the screen for a new game."""
         self.column = self.initial_column
+        self.pending_scroll = (0, 0)
         self.print_lesson('', '')
         self.print_inventory()
         self.print_mice()
@@ -256,6 +325,23 @@ class Screen(object):
         :param clock: The clock to use to time the scrolling.
         """
         self.column -= self.width
+        if self.dirty_rects:
+            # Start with a blank play area, and then reveal one more column
+            # of the skool (at the right-hand edge of the screen) in each frame
+            play_area = pygame.Rect(0, 0, self.screen.get_width(), skool.get_height())
+            self.screen.fill((0, 0, 0), play_area)
+            self.redraw = False
+            self.drawn_column = self.column
+            self.sprites = {}
+            self.dirty = []
+            column_width = 8 * self.scale
+            for n in range(self.width):
+                self.column += 1
+                self.visible_area = pygame.Rect(play_area.width - column_width * (n + 1), 0, column_width * (n + 1), play_area.height)
+                skool.draw()
+                clock.tick(self.scroll_fps)
+            self.visible_area = None
+            return
         background = pygame.Surface((self.screen.get_width(), skool.get_height()))
         for n in range(self.width):
             self.column += 1
@@ -264,8 +350,26 @@ class Screen(object):
             self._update()
             clock.tick(self.scroll_fps)
 
+    def _get_scroll(self, inc):
+        """Return the direction in which to scroll the skool and the number of
+        columns to scroll.
+
+        :param inc: The scroll increment (-1 to scroll rightwards, 1 to scroll
+                    leftwards).
+        :return: A 2-tuple, `(scroll_inc, num_cols)`.
+        """
+        if inc > 0:
+            return 1, min(self.scroll_columns, self.max_column - self.column)
+        if inc < 0:
+            return -1, min(self.scroll_columns, self.column)
+        return 0, self.scroll_columns
+
     def scroll(self, inc, skool, clock):
-        """Scroll the skool a number of columns across the screen.
+        """Scroll the skool a number of columns across the screen. If the
+        `BlockingScroll` configuration parameter is 0, the scroll is merely
+        scheduled: the screen will then scroll one column in each subsequent
+        frame (see :meth:`advance_scroll`) while the characters continue to
+        move.
 
         :param inc: The scroll increment (-1 to scroll one column at a time
                     rightwards, 1 to scroll one column at a time leftwards).
@@ -274,20 +378,26 @@ class Screen(object):
         :type clock: `pygame.time.Clock`
         :param clock: The clock to use to time the scrolling.
         """
-        scroll_inc = 0
-        num_cols = self.scroll_columns
-        if inc > 0:
-            scroll_inc = 1
-            num_cols = min(num_cols, self.max_column - self.column)
-        elif inc < 0:
-            scroll_inc = -1
-            num_cols = min(num_cols, self.column)
+        scroll_inc, num_cols = self._get_scroll(inc)
+        if not self.blocking_scroll:
+            if not self.pending_scroll[1]:
+                self.pending_scroll = (scroll_inc, num_cols)
+            return
         for i in range(num_cols):
             self.column += scroll_inc
             skool.draw()
-            self._update()
             clock.tick(self.scroll_fps)
 
+    def advance_scroll(self):
+        """Scroll the screen by one column if a scroll has been scheduled by
+        :meth:`scroll`. This method is called once per frame, whether or not
+        the frame is drawn.
+        """
+        scroll_inc, num_cols = self.pending_scroll
+        if num_cols:
+            self.column += scroll_inc
+            self.pending_scroll = (scroll_inc, num_cols - 1)
+
     def get_text(self, words, ink, paper, transparent=True):
         """Return a `pygame.Surface` displaying some text in the skool font.
 
@@ -296,23 +406,51 @@ class Screen(object):
         :param paper: The paper colour to use.
         :param transparent: Whether the paper colour should be transparent.
         """
-        surface = self.font.render(words, ink, paper)
-        if transparent:
-            surface.set_colorkey(paper)
-        return surface
+        return self.font.render(words, ink, paper, transparent)
 
     def get_text_width(self, text):
         """Return the width (in pixels) of `text` when rendered at scale 1."""
         return self.font.get_width(text)
 
+    def update_panels(self):
+        """Redraw those panels (the lesson box, score box, inventory and mouse
+        inventory) whose contents have changed since they were last drawn, and
+        update the parts of the display they occupy. A panel that is printed
+        more than once between calls to this method is drawn only once.
+        """
+        rects = []
+        for name, draw_panel in (
+            ('lesson', self._draw_lesson_box),
+            ('score', self._draw_score_box),
+            ('inventory', self._draw_inventory),
+            ('mice', self._draw_mice)
+        ):
+            contents = self.panels.get(name)
+            if contents is not None and contents != self.drawn_panels.get(name):
+                rects.extend(draw_panel(*contents))
+                self.drawn_panels[name] = contents
+        if rects:
+            self._update(rects)
+
     def print_lesson(self, *text_lines):
-        """Print some text in the lesson box.
+        """Print some text in the lesson box. The lesson box is actually drawn
+        the next time :meth:`update_panels` is called.
 
         :param text_lines: The lines of text to print.
         """
+        text_lines = list(text_lines)
         while len(text_lines) < 2:
             text_lines.append('')
-        line1, line2 = text_lines[:2]
+        self.panels['lesson'] = tuple(text_lines[:2])
+
+    def _draw_lesson_box(self, line1, line2):
+        """Draw the lesson box.
+
+        :param line1: The first line of text.
+        :param line2: The second line of text.
+        :return: A list containing the rectangle of the screen that was drawn
+                 on.
+        """
         lesson_box = self.lesson_box.surface.copy()
         line1_text = self.get_text(line1, self.lesson_box_ink, self.lesson_box_key)
         line2_text = self.get_text(line2, self.lesson_box_ink, self.lesson_box_key)
@@ -325,42 +463,73 @@ class Screen(object):
         lesson_box.blit(line2_text, (line2_x, line2_y))
         coords = self.scale_coords(self.lesson_box_pos)
         self.screen.blit(lesson_box, coords)
-        self._update(pygame.Rect(coords, lesson_box.get_size()))
+        return [pygame.Rect(coords, lesson_box.get_size())]
 
-    def _print_number(self, surface, number, y_offset):
-        """Print a number right-aligned on a surface.
+    def print_score_box(self, score, lines, hi_score):
+        """Print the score, lines total and hi-score in the score box. The
+        score box is actually drawn the next time :meth:`update_panels` is
+        called.
 
-        :type surface: `pygame.Surface`
-        :param surface: The surface.
-        :param number: The number.
-        :param y_offset: The y-offset at which to print the number.
+        :param score: The score.
+        :param lines: The lines total.
+        :param hi_score: The hi-score.
         """
-        number_text = self.get_text(str(number), self.score_box_ink, self.score_box_key)
-        surface.blit(number_text, (surface.get_width() - number_text.get_width() - self.scale, y_offset * self.scale))
+        self.panels['score'] = (score, lines, hi_score)
 
-    def print_score_box(self, score, lines, hi_score):
-        """Print the score, lines total and hi-score in the score box.
+    def _draw_score_box(self, score, lines, hi_score):
+        """Draw those numbers in the score box that have changed since the
+        score box was last drawn.
 
         :param score: The score.
         :param lines: The lines total.
         :param hi_score: The hi-score.
+        :return: A list of the rectangles of the screen that were drawn on.
         """
-        background = self.score_box.surface.copy()
-        self._print_number(background, score, self.score_offset)
-        self._print_number(background, lines, self.lines_offset)
-        self._print_number(background, hi_score, self.hi_score_offset)
         coords = self.scale_coords(self.score_box_coords)
-        self.screen.blit(background, coords)
-        self._update(pygame.Rect(coords, background.get_size()))
+        drawn = self.drawn_panels.get('score', (None, None, None))
+        offsets = (self.score_offset, self.lines_offset, self.hi_score_offset)
+        rects = []
+        for number, drawn_number, y_offset in zip((score, lines, hi_score), drawn, offsets):
+            if number != drawn_number:
+                rects.append(self._print_number(coords, number, y_offset))
+        return rects
+
+    def _print_number(self, coords, number, y_offset):
+        """Print a number right-aligned in the score box, over the line of the
+        score box on which it is printed.
+
+        :param coords: The coordinates of the score box on the screen.
+        :param number: The number.
+        :param y_offset: The y-offset at which to print the number.
+        :return: The rectangle of the screen that was drawn on.
+        """
+        line = pygame.Rect(0, y_offset * self.scale, self.score_box.get_width(), 8 * self.scale)
+        rect = line.move(coords)
+        self.screen.blit(self.score_box.surface, rect, line)
+        number_text = self.get_text(str(number), self.score_box_ink, self.score_box_key)
+        self.screen.set_clip(pygame.Rect(coords, self.score_box.get_size()))
+        self.screen.blit(number_text, (rect.right - number_text.get_width() - self.scale, rect.y))
+        self.screen.set_clip(None)
+        return rect
 
     def print_inventory(self, item_images=()):
-        """Print the inventory. If no inventory is defined, nothing happens.
+        """Print the inventory. The inventory is actually drawn the next time
+        :meth:`update_panels` is called.
 
         :param item_images: A sequence of item images to draw in the inventory
                             box.
         """
+        self.panels['inventory'] = (tuple(item_images),)
+
+    def _draw_inventory(self, item_images):
+        """Draw the inventory. If no inventory is defined, nothing happens.
+
+        :param item_images: A sequence of item images to draw in the inventory
+                            box.
+        :return: A list of the rectangles of the screen that were drawn on.
+        """
         if not self.inventory_coords:
-            return
+            return []
         inventory_box = pygame.Surface(self.scale_coords(self.inventory_size))
         inventory_box.fill(self.inventory_key)
         inventory_box.set_colorkey(self.inventory_key)
@@ -374,17 +543,27 @@ class Screen(object):
         coords = self.scale_coords(self.inventory_coords)
         self.screen.blit(background, coords)
         self.screen.blit(inventory_box, coords)
-        self._update(pygame.Rect(coords, inventory_box.get_size()))
+        return [pygame.Rect(coords, inventory_box.get_size())]
 
     def print_mice(self, count=0, mouse_image=None):
-        """Print the mouse inventory. If no mouse inventory is defined, nothing
+        """Print the mouse inventory. The mouse inventory is actually drawn the
+        next time :meth:`update_panels` is called.
+
+        :param count: The number of mice to draw.
+        :param mouse_image: An image of a captured mouse.
+        """
+        self.panels['mice'] = (count, mouse_image)
+
+    def _draw_mice(self, count, mouse_image):
+        """Draw the mouse inventory. If no mouse inventory is defined, nothing
         happens.
 
         :param count: The number of mice to draw.
         :param mouse_image: An image of a captured mouse.
+        :return: A list of the rectangles of the screen that were drawn on.
         """
         if not self.mouse_box_coords:
-            return
+            return []
         mouse_box = pygame.Surface(self.scale_coords(self.mouse_box_size))
         mouse_box.fill(self.inventory_key)
         mouse_box.set_colorkey(self.inventory_key)
@@ -400,7 +579,7 @@ class Screen(object):
         coords = self.scale_coords(self.mouse_box_coords)
         self.screen.blit(background, coords)
         self.screen.blit(mouse_box, coords)
-        self._update(pygame.Rect(coords, mouse_box.get_size()))
+        return [pygame.Rect(coords, mouse_box.get_size())]
 
     def contains(self, character, full=True):
         """Return whether a character is on-screen.
@@ -425,9 +604,12 @@ class Screen(object):
         :type paper: RGB triplet
         :param paper: The paper colour of the box.
         """
-        box = pygame.Surface(self.message_box.get_size())
-        box.fill(paper)
-        box.blit(self.message_box.surface, (0, 0))
+        if paper not in self.message_box_backgrounds:
+            background = pygame.Surface(self.message_box.get_size())
+            background.fill(paper)
+            background.blit(self.message_box.surface, (0, 0))
+            self.message_box_backgrounds[paper] = background
+        box = self.message_box_backgrounds[paper].copy()
         box_width, box_height = box.get_size()
         line_height = self.scale * 8
         text_y = (box_height - line_height * len(message)) // 2
@@ -446,7 +628,9 @@ class Screen(object):
         elif box_x + box_width > self.screen.get_width():
             box_x = self.screen.get_width() - box_width
         self.screen.blit(box, (box_x, box_y))
-        self._update(pygame.Rect((box_x, box_y), (box_width, box_height)))
+        box_rect = pygame.Rect((box_x, box_y), (box_width, box_height))
+        self.dirty.append(box_rect.move(self.scale_coords((self.column, 0))[0], 0))
+        self._update(box_rect)
 
     def get_bubble(self, words, lip_pos, shift):
         """Create a speech bubble displaying a portion of a message.
@@ -461,40 +645,133 @@ class Screen(object):
                  bubble image (an :class:`Image`), and `done` is `True` if the
                  entire message has been spoken, `False` otherwise.
         """
-        bubble = pygame.Surface(self.scale_coords(self.speech_bubble_size))
-        bubble.fill(self.speech_bubble_colorkey)
-        bubble.set_colorkey(self.speech_bubble_colorkey)
-        bubble.blit(self.bubble.surface, (0, 0))
-        lip_x = min(lip_pos, self.speech_bubble_size[0] - self.bubble_lip_size[0])
-        lip_coords = self.scale_coords((lip_x, self.speech_bubble_size[1] - self.bubble_lip_size[1]))
-        bubble.blit(self.bubble_lip.surface, lip_coords)
+        return self.get_speech_bubble(words, lip_pos).show(shift)
 
-        # Open the lip of the speech bubble
-        open_lip_xy = (lip_coords[0], lip_coords[1] - self.scale)
-        open_lip_area = (0, 0, self.bubble_lip.get_width(), self.scale)
-        bubble.blit(self.bubble_lip.surface, open_lip_xy, open_lip_area)
+    def get_speech_bubble(self, words, lip_pos, bubble=None):
+        """Return a speech bubble in which a message can be displayed.
 
-        text = self.get_text(words, self.speech_bubble_ink, self.speech_bubble_colorkey)
-        tile_width = 8 * self.scale
-        min_inset_x = self.speech_bubble_inset[0] * self.scale
-        inset_x = min_inset_x - tile_width * min(shift, 0)
-        inset_y = self.speech_bubble_inset[1] * self.scale
-        text_x = max(shift, 0) * tile_width
-        max_width = tile_width * self.speech_bubble_size[0] - 2 * min_inset_x
-        width = min(min_inset_x + max_width - inset_x, text.get_width() - text_x)
-        text_window = text.subsurface((text_x, 0), (width, tile_width))
-        bubble.blit(text_window, (inset_x, inset_y))
-        return (Image(None, None, bubble), width < 0)
-
-    def _update(self, *args):
+        :param words: The text of the message.
+        :param lip_pos: The offset (in tiles) from the left edge of the speech
+                        bubble at which to place the lip.
+        :type bubble: :class:`SpeechBubble`
+        :param bubble: The speech bubble previously used to display the
+                       message; this will be returned if it is still suitable.
+        :return: A :class:`SpeechBubble`.
+        """
+        if bubble and bubble.words == words and bubble.lip_pos == lip_pos and bubble.scale == self.scale:
+            return bubble
+        return SpeechBubble(self, words, lip_pos)
+
+    def _update(self, rects=None):
         """Update the display.
 
-        :param args: Arguments passed to `pygame.display.update`.
+        :param rects: The rectangle or list of rectangles of the screen to
+                      update (or `None` to update the whole screen).
+        """
+        if self.zoom > 1:
+            rects = self._zoom(rects)
+        if rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+
+    def _zoom(self, rects):
+        """Scale up parts of the frame buffer onto the display.
+
+        :param rects: The rectangle or list of rectangles of the frame buffer
+                      to scale up (or `None` to scale up the whole frame).
+        :return: A list of the rectangles of the display that were drawn on.
+        """
+        display = pygame.display.get_surface()
+        frame = self.screen.get_rect()
+        if rects is None:
+            rects = [frame]
+        elif not isinstance(rects, list):
+            rects = [rects]
+        zoomed = []
+        for rect in rects:
+            rect = frame.clip(rect)
+            if rect.width and rect.height:
+                zoomed_rect = pygame.Rect(self.zoom * rect.x, self.zoom * rect.y, self.zoom * rect.width, self.zoom * rect.height)
+                pygame.transform.scale(self.screen.subsurface(rect), zoomed_rect.size, display.subsurface(zoomed_rect))
+                zoomed.append(zoomed_rect)
+        return zoomed
+
+    def invalidate(self, coords, size):
+        """Mark a region of the play area as changed, so that it is redrawn in
+        the next frame. This method should be called whenever a skool image is
+        modified (e.g. when a door opens or something is written on a
+        blackboard).
+
+        :param coords: The coordinates of the top-left of the region in the
+                       play area.
+        :param size: The size (in pixels) of the region.
+        """
+        if not self.redraw:
+            self.dirty.append(pygame.Rect(self.scale_coords(coords), size))
+
+    def _get_sprites(self, images):
+        """Return a dictionary of the rectangles of the play area (in pixels,
+        relative to its left edge rather than to the screen) occupied by a list
+        of images. Each key is a 4-tuple, `(n, x, y, image)`, where `n` is the
+        position of the image in the drawing order (so that a change in the
+        order in which overlapping images are drawn is also detected).
+
+        :param images: The images (3-tuples, `(x, y, image)`).
+        """
+        sprites = {}
+        for n, (x, y, image) in enumerate(images):
+            if image and image.surface:
+                sprites[(n, x, y, image)] = pygame.Rect(self.scale_coords((x, y)), image.surface.get_size())
+        return sprites
+
+    def _get_dirty_rects(self, sprites, area, exposed):
+        """Return a list of the rectangles of the screen that need to be
+        redrawn: those occupied by sprites that have moved, appeared,
+        disappeared or changed since the last frame, those that have been
+        marked as changed by :meth:`invalidate`, and those that have been
+        exposed by scrolling. Overlapping rectangles are merged.
+
+        :param sprites: The rectangles of the play area occupied by the sprites
+                        to be drawn in this frame.
+        :type area: `pygame.Rect`
+        :param area: The part of the screen to which the rectangles should be
+                     confined.
+        :param exposed: The rectangles of the screen exposed by scrolling.
         """
-        pygame.display.update(*args)
+        rects = [r for k, r in self.sprites.items() if k not in sprites]
+        rects.extend([r for k, r in sprites.items() if k not in self.sprites])
+        rects.extend(self.dirty)
+        x_offset = -self.scale_coords((self.column, 0))[0]
+        rects = [r.move(x_offset, 0) for r in rects]
+        rects.extend(exposed)
+        return self._merge_rects(rects, area)
+
+    def _merge_rects(self, rects, area):
+        """Return a list of rectangles in which any overlapping rectangles from
+        a given list have been merged.
+
+        :param rects: The rectangles.
+        :type area: `pygame.Rect`
+        :param area: The area to which the rectangles should be confined.
+        """
+        merged = []
+        for rect in rects:
+            rect = rect.clip(area)
+            if rect.width and rect.height:
+                index = rect.collidelist(merged)
+                while index >= 0:
+                    rect.union_ip(merged.pop(index))
+                    index = rect.collidelist(merged)
+                merged.append(rect)
+        return merged
 
     def draw(self, skool_images, cast, speech_bubbles, update):
-        """Draw everything on the screen.
+        """Draw everything on the screen. Unless `update` is `False`, only
+        those parts of the play area that have changed since the last frame
+        are redrawn; if the screen has scrolled by fewer columns than its
+        width, the existing contents of the play area are shifted across and
+        only the newly exposed columns are drawn in full.
 
         :param skool_images: The play area images.
         :param cast: The cast (3-tuples, `(x, y, image)`, where `x` and `y`
@@ -503,24 +780,124 @@ class Screen(object):
         :param speech_bubbles: Speech bubbles (3-tuples, `(x, y, image)`).
         :param update: Whether to update the screen after drawing.
         """
+        self.update_panels()
+        if self.mode == 1:
+            self._update_composite(skool_images[1].surface, skool_images[2].surface)
+        sprites = self._get_sprites(list(cast) + list(speech_bubbles))
+        cast_blits = self._get_blits(cast)
+        bubble_blits = self._get_blits(speech_bubbles)
+        skool_height = (skool_images[0] or skool_images[1]).get_height()
+        shift = self.column - (self.drawn_column or 0)
+        if self.dirty_rects and update and not self.redraw and self.drawn_column is not None and abs(shift) < self.width:
+            play_area = pygame.Rect(0, 0, self.screen.get_width(), skool_height)
+            exposed = []
+            if shift:
+                dx = -shift * 8 * self.scale
+                self.screen.set_clip(play_area)
+                self.screen.scroll(dx)
+                if dx < 0:
+                    exposed.append(pygame.Rect(play_area.right + dx, 0, -dx, skool_height))
+                else:
+                    exposed.append(pygame.Rect(0, 0, dx, skool_height))
+            dirty_rects = self._get_dirty_rects(sprites, self.visible_area or play_area, exposed)
+            for rect in dirty_rects:
+                self._draw_area(skool_images, cast_blits, bubble_blits, rect)
+            self.screen.set_clip(None)
+            if shift:
+                self._update(play_area)
+            elif dirty_rects:
+                self._update(dirty_rects)
+        else:
+            self._draw_area(skool_images, cast_blits, bubble_blits)
+            if update:
+                self._update()
+        if update and self.capture:
+            self.capture.record(pygame.display.get_surface())
+        self.redraw = False
+        self.drawn_column = self.column
+        self.sprites = sprites
+        self.dirty = []
+
+    def _get_blits(self, images):
+        """Return a list of the surfaces of those images that are at least
+        partly inside the visible columns of the play area, and the screen
+        coordinates at which they should be drawn.
+
+        :param images: The images (3-tuples, `(x, y, image)`).
+        :return: A list of 2-tuples, `(surface, (x, y))`.
+        """
+        tile_width = 8 * self.scale
+        x_offset = tile_width * self.column
+        screen_width = self.screen.get_width()
+        blits = []
+        for x, y, image in images:
+            if image and image.surface:
+                left = tile_width * x - x_offset
+                if -image.surface.get_width() < left < screen_width:
+                    blits.append((image.surface, (left, tile_width * y)))
+        return blits
+
+    def _update_composite(self, skool_ink, skool_paper):
+        """Bring the composite image of the play area (the skool ink image
+        drawn over the skool paper image) up to date. The whole image is built
+        after the screen has been set up, rescaled or covered by a menu;
+        otherwise only the regions that have been marked as changed by
+        :meth:`invalidate` are redrawn.
+
+        :type skool_ink: `pygame.Surface`
+        :param skool_ink: The skool ink image.
+        :type skool_paper: `pygame.Surface`
+        :param skool_paper: The skool paper image.
+        """
+        if self.redraw or self.composite is None or self.composite.get_size() != skool_paper.get_size():
+            self.composite = skool_paper.copy()
+            regions = [self.composite.get_rect()]
+        else:
+            regions = self.dirty
+            for rect in regions:
+                self.composite.blit(skool_paper, rect, rect)
+        skool_ink.set_colorkey(self.skool_colorkey)
+        for rect in regions:
+            self.composite.blit(skool_ink, rect, rect)
+        skool_ink.set_colorkey(None)
+
+    def _draw_area(self, skool_images, cast, speech_bubbles, rect=None):
+        """Draw the play area, the cast and the speech bubbles. In graphics
+        mode 1, the part of the play area not occupied by the cast is drawn
+        from the composite image of the skool, and only the parts occupied by
+        the cast are built up from the skool ink and paper images.
+
+        :param skool_images: The play area images.
+        :param cast: The cast (2-tuples, `(surface, (x, y))`).
+        :param speech_bubbles: Speech bubbles (2-tuples, `(surface, (x, y))`).
+        :type rect: `pygame.Rect`
+        :param rect: The part of the screen to draw (the whole screen if
+                     `None`).
+        """
+        self.screen.set_clip(rect)
         if self.mode == 0:
             self._draw_skool(self.screen, skool_images[0].surface)
-            for x, y, image in cast:
-                self._draw_image(self.screen, x, y, image)
+            self._draw_images(self.screen, cast)
         else:
             skool_ink = skool_images[1].surface
-            height = skool_ink.get_height()
-            scratch = pygame.Surface((self.width * 8 * self.scale, height))
-            self._draw_skool(scratch, skool_ink)
-            for x, y, image in cast:
-                self._draw_image(scratch, x, y, image)
-            self._draw_skool(self.screen, skool_images[2].surface)
-            scratch.set_colorkey(self.skool_colorkey)
-            self.screen.blit(scratch, (0, 0))
-        for x, y, image in speech_bubbles:
-            self._draw_image(self.screen, x, y, image)
-        if update:
-            self._update()
+            area = rect or pygame.Rect((0, 0), (self.screen.get_width(), skool_ink.get_height()))
+            cast_rects = [pygame.Rect(coords, surface.get_size()) for surface, coords in cast]
+            cast_rects = self._merge_rects([cast_rects[i] for i in area.collidelistall(cast_rects)], area)
+            if cast_rects != [area]:
+                self._draw_skool(self.screen, self.composite)
+            size = (self.width * 8 * self.scale, skool_ink.get_height())
+            if self.scratch is None or self.scratch.get_size() != size:
+                self.scratch = pygame.Surface(size)
+                self.scratch.set_colorkey(self.skool_colorkey)
+            for cast_rect in cast_rects:
+                self.screen.set_clip(cast_rect)
+                self.scratch.set_clip(cast_rect)
+                self._draw_skool(self.scratch, skool_ink)
+                self._draw_images(self.scratch, cast)
+                self._draw_skool(self.screen, skool_images[2].surface)
+                self.screen.blit(self.scratch, (0, 0))
+            self.screen.set_clip(rect)
+        self._draw_images(self.screen, speech_bubbles)
 
     def _draw_skool(self, surface, skool):
         """Draw the skool.
@@ -532,25 +909,30 @@ class Screen(object):
         """
         surface.blit(skool, self.scale_coords((-self.column, 0)))
 
-    def _draw_image(self, surface, x, y, image):
-        """Draw an image on a surface.
+    def _draw_images(self, surface, blits):
+        """Draw some images on a surface.
 
         :type surface: `pygame.Surface`
-        :param surface: The surface on which to draw the image.
-        :param x: The x-coordinate of the image.
-        :param y: The y-coordinate of the image.
-        :type image: :class:`Image`
-        :param image: The image.
+        :param surface: The surface on which to draw the images.
+        :param blits: The images and their screen coordinates (2-tuples,
+                      `(surface, (x, y))`).
         """
-        if image and image.surface:
-            surface.blit(image.surface, self.scale_coords((x - self.column, y)))
+        if hasattr(surface, 'blits'):
+            # Pygame 1.9.4+
+            surface.blits(blits, False)
+        else:
+            for image, coords in blits:
+                surface.blit(image, coords)
 
     def take_screenshot(self, filename):
-        """Take a screenshot and save it to a file.
+        """Take a screenshot, to be saved to a file in the background by the
+        screen's :class:`~pyskool.capture.Capture` object.
 
         :param filename: The name of the file.
+        :return: `True` if the screenshot was taken, or `False` if it was
+                 dropped because too many frames are waiting to be saved.
         """
-        pygame.image.save(self.screen, filename)
+        return self.capture.save(pygame.display.get_surface(), filename)
 
     def has_font_char(self, char):
         """Return whether the skool font contains a bitmap for a given
@@ -616,6 +998,7 @@ class Screen(object):
             menu_surface.blit(status, (labels_x, labels_y))
         menu_surface.set_alpha(menu.alpha)
 
+        self.redraw = True
         menu_pos = ((screen_size[0] - menu_width) // 2, (screen_size[1] - menu_height) // 2)
         if menu.backdrop:
             self.screen.blit(menu.backdrop, menu_pos)
@@ -627,25 +1010,96 @@ class Screen(object):
         else:
             self._update(pygame.Rect(menu_pos, menu_surface.get_size()))
 
+class HeadlessScreen(Screen):
+    """A screen that is never displayed. It keeps track of the leftmost
+    column of the play area in the same way as :class:`Screen`, but neither
+    draws nor updates anything, and never waits for a clock. It is used when
+    the game is run in headless mode.
+
+    :type config: dict
+    :param config: Configuration parameters from the ini file.
+    :type gallery: :class:`Gallery`
+    :param gallery: The gallery of images to use for drawing.
+    :param title_prefix: The window title prefix.
+    """
+    def scroll_skool(self, skool, clock):
+        """Move the screen to its initial column without drawing anything.
+
+        :type skool: :class:`~pyskool.skool.Skool`
+        :param skool: The skool.
+        :param clock: The clock (not used).
+        """
+        return
+
+    def scroll(self, inc, skool, clock):
+        """Move the screen a number of columns left or right without drawing
+        anything.
+
+        :param inc: The scroll increment (-1 to scroll rightwards, 1 to scroll
+                    leftwards).
+        :type skool: :class:`~pyskool.skool.Skool`
+        :param skool: The skool.
+        :param clock: The clock (not used).
+        """
+        scroll_inc, num_cols = self._get_scroll(inc)
+        if self.blocking_scroll:
+            self.column += scroll_inc * num_cols
+        elif not self.pending_scroll[1]:
+            self.pending_scroll = (scroll_inc, num_cols)
+
+    def invalidate(self, coords, size):
+        """Do nothing (there is no display to redraw)."""
+        return
+
+    def _update(self, rects=None):
+        """Do nothing (there is no display to update)."""
+        return
+
+    def update_panels(self):
+        """Do nothing (there is no display to draw the panels on)."""
+        return
+
+    def draw(self, skool_images, cast, speech_bubbles, update):
+        """Do nothing (there is no display to draw on)."""
+        return
+
+    def draw_menu(self, menu, refresh=False):
+        """Do nothing (there is no display to draw the menu on)."""
+        return
+
 class Gallery:
     """A container for all the images used in a game.
 
+    Images that have to be scaled up are saved (already scaled) in a cache
+    directory, and loaded from there the next time they are needed at the same
+    scale. In addition, the unmodified images for the most recently used
+    scales are kept in memory, so that switching back to one of those scales
+    does not involve loading any images at all.
+
     :param images_dir: The path to the `images` directory.
     :param image_set: The name of the set of images to use.
     :param scale: The desired scale of the images.
     :type images: dict
     :param images: Key-value pairs (image ID, path) from the `Images` section.
+    :param cache_dir: The directory in which to store scaled-up images (or
+                      `None` to scale up images every time they are loaded).
+    :param cache_size: The number of scales for which to keep images in memory.
     """
-    def __init__(self, images_dir, image_set, scale, images):
+    def __init__(self, images_dir, image_set, scale, images, cache_dir=None, cache_size=0):
         self.images_dir = images_dir
         self.image_set = image_set
         self.images = images
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
         self.reset(scale)
 
     def __getstate__(self):
         d = self.__dict__.copy()
         d['images_dir'] = None
         d['surfaces'] = {}
+        d['flipped_surfaces'] = {}
+        d['cache'] = OrderedDict()
         return d
 
     def restore(self, images_dir):
@@ -656,12 +1110,16 @@ class Gallery:
         self.images_dir = images_dir
 
     def reset(self, scale):
-        """Set the scale and clear the image cache.
+        """Set the scale and clear the image cache. Any unmodified images for
+        the new scale that are being kept in memory will be reused.
 
         :param scale: The scale.
         """
         self.scale = scale
         self.surfaces = {}
+        self.flipped_surfaces = {}
+        if scale in self.cache:
+            self.cache[scale] = self.cache.pop(scale)
 
     def scale_coords(self, coords):
         """Scale up a pair of coordinates and return them.
@@ -709,6 +1167,53 @@ class Gallery:
             return self.surfaces[image_id]
         if image_id not in self.images:
             return None
+        originals = self._get_originals()
+        if originals and image_id in originals:
+            img = originals[image_id].copy()
+        else:
+            img = self._load_surface(image_id)
+            if img is None:
+                return None
+            if originals is not None:
+                # Keep an unmodified copy of the image, because the one we
+                # return may be drawn on (e.g. by a blackboard)
+                originals[image_id] = img
+                img = img.copy()
+        self.surfaces[image_id] = img
+        return img
+
+    def get_flipped_surface(self, image_id):
+        """Return a horizontally flipped copy of an image from the gallery.
+        The flipped copy is made only once (for each scale), and should not be
+        drawn on.
+
+        :param image_id: The ID of the image.
+        """
+        if image_id not in self.flipped_surfaces:
+            self.flipped_surfaces[image_id] = pygame.transform.flip(self.get_surface(image_id), True, False)
+        return self.flipped_surfaces[image_id]
+
+    def _get_originals(self):
+        """Return the dictionary of unmodified images being kept in memory for
+        the current scale, or `None` if no images are being kept in memory.
+        """
+        if self.cache_size > 0:
+            if self.scale not in self.cache:
+                self.cache[self.scale] = {}
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(False)
+            return self.cache[self.scale]
+
+    def _load_surface(self, image_id):
+        """Load an image from disk, scaling it up as necessary. If the image
+        needs scaling up and a cache directory has been specified, the
+        scaled-up image is loaded from (or, if not found, saved to) that
+        directory.
+
+        :param image_id: The ID of the image.
+        :return: The image (a `pygame.Surface`), or `None` if the image file
+                 could not be found.
+        """
         scale_up = True
         image_set_dir = os.path.join(self.images_dir, '%sx%i' % (self.image_set, self.scale))
         if os.path.isdir(image_set_dir):
@@ -720,12 +1225,100 @@ class Gallery:
         if not os.path.isfile(image_file):
             debug.log("Unable to load image '%s' from %s: file not found" % (image_id, image_file))
             return None
+        cache_file = None
+        if scale_up and self.scale > 1 and self.cache_dir:
+            cache_file = self._get_cache_file(image_file)
+            if os.path.isfile(cache_file):
+                try:
+                    return pygame.image.load(cache_file).convert()
+                except pygame.error as e:
+                    debug.log("Unable to load image '%s' from %s: %s" % (image_id, cache_file, e))
         img = pygame.image.load(image_file).convert()
         if scale_up:
             img = pygame.transform.scale(img, (self.scale * img.get_width(), self.scale * img.get_height()))
-        self.surfaces[image_id] = img
+        if cache_file:
+            try:
+                cache_subdir = os.path.dirname(cache_file)
+                if not os.path.isdir(cache_subdir):
+                    os.makedirs(cache_subdir)
+                pygame.image.save(img, cache_file)
+            except (OSError, IOError, pygame.error) as e:
+                debug.log("Unable to save image '%s' to %s: %s" % (image_id, cache_file, e))
         return img
 
+    def _get_cache_file(self, image_file):
+        """Return the path of the file in the cache directory in which to store
+        a scaled-up image. The file is named after a digest of the contents of
+        the original image file, so that any modification of that file will
+        cause the cached image to be ignored.
+
+        :param image_file: The path to the original image file.
+        """
+        with open(image_file, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        cache_dir = os.path.normpath(self.cache_dir)
+        # The BMP format is used because it is much faster to load than PNG
+        return os.path.join(cache_dir, '%sx%i' % (self.image_set, self.scale), '%s.bmp' % digest)
+
+class SpeechBubble:
+    """A speech bubble in which a message is displayed one portion at a time.
+    The bubble and the text of the message are rendered only once; displaying
+    another portion of the message involves redrawing only the text window of
+    the bubble.
+
+    :type screen: :class:`Screen`
+    :param screen: The screen.
+    :param words: The text of the message.
+    :param lip_pos: The offset (in tiles) from the left edge of the speech
+                    bubble at which to place the lip.
+    """
+    def __init__(self, screen, words, lip_pos):
+        self.words = words
+        self.lip_pos = lip_pos
+        self.scale = screen.scale
+        self.frame = pygame.Surface(screen.scale_coords(screen.speech_bubble_size))
+        self.frame.fill(screen.speech_bubble_colorkey)
+        self.frame.blit(screen.bubble.surface, (0, 0))
+        lip_x = min(lip_pos, screen.speech_bubble_size[0] - screen.bubble_lip_size[0])
+        lip_coords = screen.scale_coords((lip_x, screen.speech_bubble_size[1] - screen.bubble_lip_size[1]))
+        self.frame.blit(screen.bubble_lip.surface, lip_coords)
+
+        # Open the lip of the speech bubble
+        open_lip_xy = (lip_coords[0], lip_coords[1] - self.scale)
+        open_lip_area = (0, 0, screen.bubble_lip.get_width(), self.scale)
+        self.frame.blit(screen.bubble_lip.surface, open_lip_xy, open_lip_area)
+
+        self.surface = self.frame.copy()
+        self.surface.set_colorkey(screen.speech_bubble_colorkey)
+        self.text = screen.get_text(words, screen.speech_bubble_ink, screen.speech_bubble_colorkey)
+        self.tile_width = 8 * self.scale
+        self.min_inset_x = screen.speech_bubble_inset[0] * self.scale
+        self.inset_y = screen.speech_bubble_inset[1] * self.scale
+        self.max_width = self.tile_width * screen.speech_bubble_size[0] - 2 * self.min_inset_x
+        self.window = pygame.Rect(self.min_inset_x, self.inset_y, self.max_width, self.tile_width)
+        self.shift = None
+
+    def show(self, shift):
+        """Display a portion of the message in the speech bubble.
+
+        :param shift: The offset (in tiles) by which to shift the text image
+                      before displaying it in the bubble; if negative, leading
+                      spaces will be displayed.
+        :return: A 2-tuple, `(bubble, done)`, where `bubble` is the speech
+                 bubble image (an :class:`Image`), and `done` is `True` if the
+                 entire message has been spoken, `False` otherwise.
+        """
+        self.shift = shift
+        self.surface.blit(self.frame, self.window, self.window)
+        inset_x = self.min_inset_x - self.tile_width * min(shift, 0)
+        text_x = max(shift, 0) * self.tile_width
+        width = min(self.min_inset_x + self.max_width - inset_x, self.text.get_width() - text_x)
+        if width > 0:
+            self.surface.blit(self.text, (inset_x, self.inset_y), (text_x, 0, width, self.tile_width))
+        # A new Image is returned so that the change is noticed when the
+        # screen is redrawn
+        return (Image(None, None, self.surface), width < 0)
+
 class Image:
     """A container for a `pygame.Surface`. This is used to handle the saving
     and restoring of images, because a `pygame.Surface` cannot be pickled
@@ -741,8 +1334,10 @@ class Image:
                      inside the parent image.
     :param flipped: If `True`, the image will be flipped before use.
     :param colorkey: The colour key.
+    :param rle: If `True`, the image will be run-length encoded (which makes
+                drawing it faster if it has a colour key).
     """
-    def __init__(self, gallery, image_id, surface, top_left=None, size=None, flipped=False, colorkey=None):
+    def __init__(self, gallery, image_id, surface, top_left=None, size=None, flipped=False, colorkey=None, rle=False):
         self.gallery = gallery
         self.image_id = image_id
         self.surface = surface
@@ -750,8 +1345,10 @@ class Image:
         self.flipped = flipped
         self.size = size
         self.colorkey = colorkey
+        self.rle = rle
         if self.surface and flipped:
             self._flip_surface()
+            self._apply_colorkey()
 
     def __getstate__(self):
         d = self.__dict__.copy()
@@ -778,12 +1375,25 @@ class Image:
             self.surface = self.surface.subsurface(self._scale_coords(self.top_left), self._scale_coords(self.size))
         if self.flipped:
             self._flip_surface()
-        if self.colorkey:
-            self.surface.set_colorkey(self.colorkey)
+        self._apply_colorkey()
 
     def _flip_surface(self):
-        """Flip the image."""
-        self.surface = pygame.transform.flip(self.surface, True, False)
+        """Flip the image. If the image is part of a larger image from the
+        gallery, it is taken from a flipped copy of that image (which is shared
+        by all the flipped images derived from it) instead.
+        """
+        if self.gallery and self.top_left and self.size:
+            parent = self.gallery.get_flipped_surface(self.image_id)
+            x, y = self._scale_coords(self.top_left)
+            width, height = self._scale_coords(self.size)
+            self.surface = parent.subsurface((parent.get_width() - x - width, y), (width, height))
+        else:
+            self.surface = pygame.transform.flip(self.surface, True, False)
+
+    def _apply_colorkey(self):
+        """Set the colour key (if there is one) of the image surface."""
+        if self.colorkey:
+            self.surface.set_colorkey(self.colorkey, pygame.RLEACCEL if self.rle else 0)
 
     def subsurface(self, coords, size):
         """Return a subsurface of the image.
@@ -793,11 +1403,11 @@ class Image:
         :param size: The size of the subsurface.
         """
         surface = self.surface.subsurface(self._scale_coords(coords), self._scale_coords(size))
-        return Image(self.gallery, self.image_id, surface, coords, size, self.flipped, self.colorkey)
+        return Image(self.gallery, self.image_id, surface, coords, size, self.flipped, self.colorkey, self.rle)
 
     def copy(self):
         """Return a copy of the image."""
-        return Image(self.gallery, self.image_id, self.surface.copy(), self.top_left, self.size, self.flipped, self.colorkey)
+        return Image(self.gallery, self.image_id, self.surface.copy(), self.top_left, self.size, self.flipped, self.colorkey, self.rle)
 
     def get_width(self):
         """Return the width of the image."""
@@ -814,18 +1424,20 @@ class Image:
         if self.surface:
             return self.surface.get_size()
 
-    def set_colorkey(self, colorkey):
+    def set_colorkey(self, colorkey, rle=False):
         """Set the colour key of the image.
 
         :param colorkey: The colour key.
+        :param rle: If `True`, the image will be run-length encoded.
         """
         self.colorkey = colorkey
+        self.rle = rle
         if self.surface:
-            self.surface.set_colorkey(colorkey)
+            self._apply_colorkey()
 
     def flip(self):
         """Return a flipped copy of the image."""
-        return Image(self.gallery, self.image_id, self.surface, self.top_left, self.size, True, self.colorkey)
+        return Image(self.gallery, self.image_id, self.surface, self.top_left, self.size, True, self.colorkey, self.rle)
 
     def blit(self, *args):
         """Blit a `pygame.Surface` onto this image.
@@ -853,6 +1465,11 @@ class Image:
 class Font:
     """The skool font.
 
+    Each font character bitmap is coloured in only once for any given
+    combination of ink and paper colours, and the most recently rendered text
+    messages are kept, so that text which is drawn repeatedly (such as the
+    contents of a speech bubble) need not be rendered again.
+
     :type image: :class:`Image`
     :param image: The font image.
     :type ink_key: RGB triplet
@@ -860,18 +1477,37 @@ class Font:
     :type paper_key: RGB triplet
     :param paper_key: The paper colour in `font.png` (used to create
                       transparency).
+    :param cache_size: The number of rendered text messages to keep.
     """
-    def __init__(self, image, ink_key, paper_key):
+    def __init__(self, image, ink_key, paper_key, cache_size=0):
         self.image = image
         self.ink_key = ink_key
         self.paper_key = paper_key
         self.characters = {}
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._clear_cache()
+
+    def __getstate__(self):
+        d = self.__dict__.copy()
+        d['glyphs'] = {}
+        d['texts'] = OrderedDict()
+        return d
+
+    def _clear_cache(self):
+        """Discard all coloured font character bitmaps and rendered text
+        messages.
+        """
+        self.glyphs = {}
+        self.texts = OrderedDict()
 
     def build_image(self):
         """Build the font image. This method is called after rescaling the
         screen or loading a saved game.
         """
         self.image.build()
+        self._clear_cache()
 
     def add_character(self, char, offset, width):
         """Define the location and width of a font character bitmap in the font
@@ -884,38 +1520,65 @@ class Font:
         """
         self.characters[char] = (offset, width)
 
-    def render(self, words, ink, paper):
+    def _get_glyph(self, char, ink, paper):
+        """Return an image (a `pygame.Surface`) of a font character bitmap in
+        the desired ink and paper colours.
+
+        :param char: The font character.
+        :type ink: RGB triplet
+        :param ink: The desired ink colour.
+        :type paper: RGB triplet
+        :param paper: The desired paper colour.
+        """
+        key = (char, ink, paper)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            offset, width = self.characters[char]
+            size = (self.image.scale_length(width), self.image.get_height())
+            text = pygame.Surface(size)
+            text.blit(self.image.surface.subsurface((self.image.scale_length(offset), 0), size), (0, 0))
+            glyph = pygame.Surface(size)
+            glyph.fill(paper)
+            ink_surface = pygame.Surface(size)
+            ink_surface.fill(ink)
+            text.set_colorkey(self.ink_key)
+            ink_surface.blit(text, (0, 0))
+            ink_surface.set_colorkey(self.paper_key)
+            glyph.blit(ink_surface, (0, 0))
+            self.glyphs[key] = glyph
+        return glyph
+
+    def render(self, words, ink, paper, transparent=False):
         """Return an image (a `pygame.Surface`) of a text message written in
-        the skool font.
+        the skool font. The image should not be drawn on, because it may be
+        returned again by a subsequent call to this method.
 
         :param words: The message.
         :type ink: RGB triplet
         :param ink: The desired ink colour.
         :type paper: RGB triplet
         :param paper: The desired paper colour.
+        :param transparent: Whether the paper colour should be transparent.
         """
-        character_images = []
-        total_width = 0
-        height = self.image.get_height()
-        for c in words:
-            offset, width = self.characters[c]
-            image = self.image.surface.subsurface((self.image.scale_length(offset), 0), (self.image.scale_length(width), height))
-            character_images.append(image)
-            total_width += width
-        text = pygame.Surface((self.image.scale_length(total_width), height))
-        offset = 0
-        for image in character_images:
-            text.blit(image, (offset, 0))
-            offset += image.get_width()
-        paper_surface = pygame.Surface((text.get_width(), text.get_height()))
-        paper_surface.fill(paper)
-        ink_surface = pygame.Surface((text.get_width(), text.get_height()))
-        ink_surface.fill(ink)
-        text.set_colorkey(self.ink_key)
-        ink_surface.blit(text, (0, 0))
-        ink_surface.set_colorkey(self.paper_key)
-        paper_surface.blit(ink_surface, (0, 0))
-        return paper_surface
+        key = (words, ink, paper, transparent)
+        text = self.texts.pop(key, None)
+        if text is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            glyphs = [self._get_glyph(c, ink, paper) for c in words]
+            text = pygame.Surface((sum([g.get_width() for g in glyphs]), self.image.get_height()))
+            offset = 0
+            for glyph in glyphs:
+                text.blit(glyph, (offset, 0))
+                offset += glyph.get_width()
+            if transparent:
+                text.set_colorkey(paper)
+        if self.cache_size > 0:
+            self.texts[key] = text
+            while len(self.texts) > self.cache_size:
+                self.texts.popitem(False)
+        return text
 
     def has_char(self, char):
         """Return whether the skool font contains a bitmap for a given
@@ -20,10 +20,17 @@ Collect input from the keyboard.
 """
 
 import pygame
+from collections import defaultdict
 
 class Keyboard:
-    """Collects input from the keyboard."""
-    def __init__(self):
+    """Collects input from the keyboard.
+
+    :type recorder: :class:`~pyskool.replay.Recorder`
+    :param recorder: The recorder to which every check of the keyboard should
+                     be reported (if any).
+    """
+    def __init__(self, recorder=None):
+        self.recorder = recorder
         self.pump()
         self.writing = False
 
@@ -39,6 +46,8 @@ class Keyboard:
         # It's important to collect pressed_keys AFTER clearing the event queue,
         # otherwise keys may appear to "stick"
         self.pressed_keys = list(pygame.key.get_pressed())
+        if self.recorder:
+            self.recorder.record_keyboard(self)
 
     def got_quit(self):
         """Return whether the window close button was clicked."""
@@ -94,3 +103,36 @@ class Keyboard:
         :param keys: A list of keys to check.
         """
         return self.was_pressed(keys) or self.is_pressed(keys)
+
+class HeadlessKeyboard(Keyboard):
+    """A keyboard on which no keys are ever pressed. It is used when the game
+    is run in headless mode.
+    """
+    def pump(self):
+        """Clear the keypresses collected since the last check."""
+        self.key_down_events = []
+        self.quit = False
+        self.pressed_keys = defaultdict(int)
+        if self.recorder:
+            self.recorder.record_keyboard(self)
+
+class ReplayKeyboard(Keyboard):
+    """A keyboard on which the keys pressed are those in a recording of a
+    game. It is used when a recorded game is replayed.
+
+    :type player: :class:`~pyskool.replay.Player`
+    :param player: The player of the recording.
+    """
+    def __init__(self, player):
+        self.player = player
+        Keyboard.__init__(self)
+
+    def pump(self):
+        """Collect the keypresses from the next check of the keyboard in the
+        recording.
+        """
+        events, held_keys, self.quit = self.player.read_keyboard()
+        self.key_down_events = [pygame.event.Event(pygame.KEYDOWN, key=key, unicode=char) for key, char in events]
+        self.pressed_keys = defaultdict(int)
+        for key in held_keys:
+            self.pressed_keys[key] = 1
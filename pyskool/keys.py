@@ -65,10 +65,14 @@ FULL_SCREEN = [pygame.K_F11]
 PAUSE = [pygame.K_END]
 #: Take a screenshot.
 SCREENSHOT = [pygame.K_INSERT]
+#: Start or stop recording frames.
+RECORD = [pygame.K_HOME]
 #: Save the game.
 SAVE = [pygame.K_F2]
 #: Load the most recently saved game.
 LOAD = [pygame.K_F6]
+#: Step the game backwards.
+REWIND = [pygame.K_BACKSPACE]
 #: Display the menu.
 MENU = [pygame.K_F12]
 #: Exit the menu.
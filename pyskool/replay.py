@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Richard Dymond (rjdymond@gmail.com)
+#
+# This file is part of Pyskool.
+#
+# Pyskool is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# Pyskool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Pyskool. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Defines the :class:`Recorder` and :class:`Player` classes.
+
+A recording of a game contains everything from outside the game that affects
+how it plays out, so that the game can be replayed exactly:
+
+* a header (:data:`MAGIC`, the format version, the seed of the random number
+  generator, a fingerprint of the objects in the skool that were built from
+  the ini files, whether the game started quickly, whether cheat keys were
+  enabled, whether rewinding was enabled, the major version of Python, the hash seed, and the configuration
+  parameters that were set on the command line)
+* an entry (compressed with zlib) for every check of the keyboard (the keys
+  that were pressed since the previous check, the keys being held down, and
+  whether the window close button was clicked) and every check of whether a
+  sound effect was still playing
+"""
+
+import os
+import struct
+import sys
+import zlib
+
+from . import debug
+
+#: The magic number at the start of a recording.
+MAGIC = b'PySr'
+
+#: The version of the recording format.
+FORMAT = 1
+
+#: The number of entries between flushes of a recording to disk.
+FLUSH_INTERVAL = 256
+
+# Entry tags
+KEYBOARD = 0
+KEYBOARD_QUIT = 1
+SOUND_STOPPED = 2
+SOUND_PLAYING = 3
+
+#: The hash seed recorded when hash randomisation is enabled.
+RANDOM_HASH_SEED = 0xFFFFFFFF
+
+_HEADER = struct.Struct('<4sHIIBBBBIH')
+_LENGTH = struct.Struct('<H')
+
+def get_hash_seed():
+    """Return the seed used to hash strings (0 if hash randomisation is
+    disabled), or :data:`RANDOM_HASH_SEED` if the seed was chosen at random.
+    The order in which sets of strings are iterated over depends on this
+    seed.
+    """
+    if not getattr(sys.flags, 'hash_randomization', 0):
+        return 0
+    seed = os.environ.get('PYTHONHASHSEED', '')
+    if seed.isdigit():
+        return int(seed)
+    return RANDOM_HASH_SEED
+
+class Recorder:
+    """Records the keyboard input and sound effect timings of a game.
+
+    :param fname: The name of the file to record to.
+    :param seed: The seed of the random number generator.
+    :param fingerprint: The fingerprint of the skool (see
+                        :func:`~pyskool.savegame.get_fingerprint`).
+    :param quick_start: Whether the game starts quickly.
+    :param cheat: Whether cheat keys are enabled.
+    :param rewind: Whether rewinding is enabled.
+    :param config: The configuration parameters set on the command line (a
+                   list of 'P,V' strings).
+    """
+    def __init__(self, fname, seed, fingerprint, quick_start, cheat, rewind, config):
+        self.fname = fname
+        self.f = open(fname, 'wb')
+        header = bytearray(_HEADER.pack(MAGIC, FORMAT, seed, fingerprint, int(bool(quick_start)), int(bool(cheat)), int(bool(rewind)), sys.version_info[0], get_hash_seed(), len(config)))
+        for param in config:
+            param = param.encode('utf-8')
+            header.extend(_LENGTH.pack(len(param)))
+            header.extend(param)
+        self.f.write(bytes(header))
+        self.compressor = zlib.compressobj()
+        self.data = bytearray()
+        self.entries = 0
+        self.size = len(header)
+
+    def _write_number(self, n):
+        """Write a non-negative integer."""
+        while n > 127:
+            self.data.append(n & 127 | 128)
+            n >>= 7
+        self.data.append(n)
+
+    def _write_text(self, text):
+        """Write a string."""
+        text = text.encode('utf-8')
+        self._write_number(len(text))
+        self.data.extend(text)
+
+    def _add_entry(self):
+        """Count an entry, and flush the recording to disk if it is due."""
+        self.entries += 1
+        if self.entries % FLUSH_INTERVAL == 0:
+            self._flush(zlib.Z_SYNC_FLUSH)
+
+    def _flush(self, mode):
+        """Compress the entries added since the last flush and write them to
+        disk.
+
+        :param mode: The zlib flush mode.
+        """
+        data = self.compressor.compress(bytes(self.data)) + self.compressor.flush(mode)
+        self.data = bytearray()
+        self.f.write(data)
+        self.f.flush()
+        self.size += len(data)
+
+    def record_keyboard(self, keyboard):
+        """Record the state of the keyboard after it has been checked.
+
+        :type keyboard: :class:`~pyskool.input.Keyboard`
+        :param keyboard: The keyboard.
+        """
+        pressed_keys = keyboard.pressed_keys
+        if isinstance(pressed_keys, dict):
+            held_keys = sorted(k for k, v in pressed_keys.items() if v)
+        else:
+            held_keys = [k for k, v in enumerate(pressed_keys) if v]
+        self.data.append(KEYBOARD_QUIT if keyboard.quit else KEYBOARD)
+        self._write_number(len(keyboard.key_down_events))
+        for event in keyboard.key_down_events:
+            self._write_number(event.key)
+            self._write_text(getattr(event, 'unicode', ''))
+        self._write_number(len(held_keys))
+        for key in held_keys:
+            self._write_number(key)
+        self._add_entry()
+
+    def record_sound(self, playing):
+        """Record whether a sound effect was still playing when checked.
+
+        :param playing: Whether the sound effect was playing.
+        """
+        self.data.append(SOUND_PLAYING if playing else SOUND_STOPPED)
+        self._add_entry()
+
+    def close(self):
+        """Write any remaining entries to disk and close the file."""
+        if self.f:
+            self._flush(zlib.Z_FINISH)
+            self.f.close()
+            self.f = None
+            debug.log('Recorded %i entries to %s (%i bytes)' % (self.entries, self.fname, self.size))
+
+class Player:
+    """Plays back the keyboard input and sound effect timings of a recorded
+    game. A recording that was cut short (for example, by a crash) is played
+    back as far as it goes.
+
+    :param fname: The name of the file to play back.
+    """
+    def __init__(self, fname):
+        self.fname = fname
+        with open(fname, 'rb') as f:
+            data = f.read()
+        if len(data) < _HEADER.size:
+            raise ValueError('File too short')
+        magic, version, self.seed, self.fingerprint, quick_start, cheat, rewind, python_version, hash_seed, num_params = _HEADER.unpack(data[:_HEADER.size])
+        if magic != MAGIC:
+            raise ValueError('Not a recording')
+        if version != FORMAT:
+            raise ValueError('Unsupported recording format: {0}'.format(version))
+        if python_version != sys.version_info[0]:
+            debug.log('%s was recorded with Python %i; it may not play back correctly' % (fname, python_version))
+        if hash_seed == RANDOM_HASH_SEED or hash_seed != get_hash_seed():
+            debug.log('%s was recorded with a different hash seed; it may not play back correctly' % fname)
+        self.quick_start = quick_start
+        self.cheat = cheat
+        self.rewind = rewind
+        self.config = []
+        index = _HEADER.size
+        for i in range(num_params):
+            if index + _LENGTH.size > len(data):
+                raise ValueError('File too short')
+            length = _LENGTH.unpack(data[index:index + _LENGTH.size])[0]
+            index += _LENGTH.size
+            if index + length > len(data):
+                raise ValueError('File too short')
+            self.config.append(data[index:index + length].decode('utf-8'))
+            index += length
+        self.data = bytearray(zlib.decompressobj().decompress(data[index:]))
+        self.index = 0
+        self.entries = 0
+        self.finished = False
+
+    def _read_number(self):
+        """Read a non-negative integer."""
+        n = shift = 0
+        while True:
+            byte = self.data[self.index]
+            self.index += 1
+            n |= (byte & 127) << shift
+            if byte < 128:
+                return n
+            shift += 7
+
+    def _read_text(self):
+        """Read a string."""
+        length = self._read_number()
+        self.index += length
+        return bytes(self.data[self.index - length:self.index]).decode('utf-8')
+
+    def _read_tag(self, tags):
+        """Read the tag of the next entry, or return `None` (and mark the
+        recording as finished) if there are no more entries or the next entry
+        is not of the expected kind.
+
+        :param tags: The tags of the expected kind of entry.
+        """
+        if not self.finished:
+            if self.index >= len(self.data):
+                debug.log('Reached the end of %s after %i entries' % (self.fname, self.entries))
+                self.finished = True
+            elif self.data[self.index] not in tags:
+                debug.log('Replay of %s out of step at entry %i' % (self.fname, self.entries))
+                self.finished = True
+            else:
+                self.index += 1
+                self.entries += 1
+                return self.data[self.index - 1]
+
+    def _check_end(self):
+        """Mark the recording as finished if the entry just read was the last
+        one, so that the game can stop before running a tick without any
+        recorded input.
+        """
+        if self.index >= len(self.data):
+            debug.log('Reached the end of %s after %i entries' % (self.fname, self.entries))
+            self.finished = True
+
+    def read_keyboard(self):
+        """Return the next recorded state of the keyboard as a 3-tuple,
+        `(events, held_keys, quit)`, where `events` is a list of `(key,
+        unicode)` tuples for the keys pressed since the previous check,
+        `held_keys` is a list of the keys being held down, and `quit` is
+        whether the window close button was clicked. If the recording has
+        finished, no keys are pressed.
+        """
+        tag = self._read_tag((KEYBOARD, KEYBOARD_QUIT))
+        if tag is None:
+            return [], [], False
+        try:
+            events = []
+            for i in range(self._read_number()):
+                key = self._read_number()
+                events.append((key, self._read_text()))
+            held_keys = [self._read_number() for i in range(self._read_number())]
+        except IndexError:
+            # The recording was cut short in the middle of this entry
+            debug.log('Reached the end of %s after %i entries' % (self.fname, self.entries - 1))
+            self.finished = True
+            return [], [], False
+        self._check_end()
+        return events, held_keys, tag == KEYBOARD_QUIT
+
+    def read_sound(self):
+        """Return whether a sound effect was recorded as still playing at the
+        next check, or `False` if the recording has finished.
+        """
+        tag = self._read_tag((SOUND_STOPPED, SOUND_PLAYING))
+        if tag is None:
+            return False
+        self._check_end()
+        return tag == SOUND_PLAYING
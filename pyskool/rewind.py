@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Richard Dymond (rjdymond@gmail.com)
+#
+# This file is part of Pyskool.
+#
+# Pyskool is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# Pyskool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Pyskool. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Defines the :class:`Rewinder` class.
+"""
+
+import zlib
+from collections import deque
+
+from . import savegame
+
+#: The compression level used for the states kept in memory.
+COMPRESSION = 1
+
+def _compress(data, base):
+    """Compress a snapshot, using another snapshot as a dictionary. A snapshot
+    taken a few ticks after another is mostly the same as it, so it compresses
+    to little more than a list of the differences.
+
+    :param data: The snapshot to compress.
+    :param base: The snapshot to use as a dictionary.
+    """
+    try:
+        compressor = zlib.compressobj(COMPRESSION, zlib.DEFLATED, zlib.MAX_WBITS, 9, zlib.Z_DEFAULT_STRATEGY, base)
+    except TypeError:
+        # Python 2 does not support preset dictionaries
+        compressor = zlib.compressobj(COMPRESSION)
+    return compressor.compress(data) + compressor.flush()
+
+def _decompress(data, base):
+    """Decompress a snapshot that was compressed by :func:`_compress`.
+
+    :param data: The compressed snapshot.
+    :param base: The snapshot that was used as a dictionary.
+    """
+    try:
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS, base)
+    except TypeError:
+        decompressor = zlib.decompressobj()
+    return decompressor.decompress(data) + decompressor.flush()
+
+class Rewinder:
+    """Keeps the most recent states of a game in memory so that the game can
+    be stepped backwards. The most recent state is kept as a snapshot (see
+    :func:`~pyskool.savegame.snapshot`); each older state is kept compressed,
+    using the state after it as a dictionary. The number of states kept is
+    fixed, so when the buffer is full, capturing a new state discards the
+    oldest one.
+
+    :param length: The maximum number of states to keep (0 = do not keep any).
+    :param interval: The number of ticks between captured states.
+    """
+    def __init__(self, length, interval):
+        self.interval = max(interval, 1)
+        self.latest = None
+        self.states = deque(maxlen=max(length - 1, 0)) if length > 0 else None
+        self.ticks = 0
+        self.fresh = False
+
+    def reset(self):
+        """Discard every state in the buffer. This method is called after a
+        saved game has been loaded.
+        """
+        self.latest = None
+        if self.states:
+            self.states.clear()
+        self.ticks = 0
+        self.fresh = False
+
+    def tick(self, skool):
+        """Capture the state of the game if one is due. This method is called
+        after each tick of the main loop.
+
+        :type skool: :class:`~pyskool.skool.Skool`
+        :param skool: The skool.
+        """
+        if self.states is not None:
+            self.ticks += 1
+            self.fresh = self.ticks >= self.interval
+            if self.fresh:
+                self.ticks = 0
+                data = savegame.snapshot(skool)
+                if self.latest is not None and self.states.maxlen:
+                    self.states.append(_compress(self.latest, data))
+                self.latest = data
+
+    def rewind(self, skool):
+        """Restore the most recently captured state of the game (or the one
+        before it if the most recent one was captured during the current
+        tick), and discard it from the buffer.
+
+        :type skool: :class:`~pyskool.skool.Skool`
+        :param skool: The skool.
+        :return: `True` if the game was rewound, or `False` if there are no
+                 more states in the buffer.
+        """
+        if self.fresh and self.latest is not None:
+            self._pop()
+        data = self._pop()
+        if data is None:
+            return False
+        savegame.restore(skool, data)
+        self.ticks = 0
+        self.fresh = False
+        return True
+
+    def _pop(self):
+        """Remove the most recently captured state from the buffer and return
+        it, or `None` if the buffer is empty.
+        """
+        data = self.latest
+        if self.states:
+            self.latest = _decompress(self.states.pop(), data)
+        else:
+            self.latest = None
+        return data
+
+    def get_size(self):
+        """Return a 2-tuple, `(states, size)`: the number of states in the
+        buffer, and the number of bytes they occupy.
+        """
+        if self.latest is None:
+            return 0, 0
+        return len(self.states) + 1, len(self.latest) + sum(len(s) for s in self.states)
@@ -72,7 +72,7 @@ class Room:
     def restore_blackboard(self):
         """Restore the image of the blackboard in this room. This method is
         used to draw the contents of a blackboard afresh after restoring a
-        saved game.
+        saved game or rewinding the game.
         """
         if self.blackboard:
             self.blackboard.restore()
@@ -281,9 +281,10 @@ class Blackboard:
 
     def restore(self):
         """Restore the image of this blackboard. This method is used after
-        restoring a saved game.
+        restoring a saved game or rewinding the game.
         """
-        self.write('')
+        self.image.blit(self.clean_image.surface, (0, 0))
+        self._draw_lines()
         for column in self.wiped_columns:
             self._wipe_column(column)
 
@@ -306,10 +307,33 @@ class Blackboard:
             self.lines[-1] += char
         else:
             self.lines.append(char)
+        if self.wiped_columns:
+            # Writing on a partly wiped blackboard redraws everything that was
+            # written on it before the wiping began
+            self._draw_lines()
+        elif char:
+            # Draw only the new character, just after the end of the text
+            # already on the line
+            x_offset = self.screen.get_text_width(self.lines[-1][:-len(char)])
+            self._draw_text(char, x_offset, len(self.lines) - 1)
+        self.screen.invalidate((self.x, self.y), self.image.get_size())
+
+    def _draw_lines(self):
+        """Draw every line of text written on the blackboard."""
         for line_no, line in enumerate(self.lines):
             if line:
-                text_image = self.screen.get_text(line, self.chalk, self.key)
-                self.image.scale_blit(text_image, (0, line_no))
+                self._draw_text(line, 0, line_no)
+
+    def _draw_text(self, text, x_offset, line_no):
+        """Draw some text on the blackboard image.
+
+        :param text: The text.
+        :param x_offset: The offset (in pixels at scale 1) from the left edge
+                         of the blackboard at which to draw the text.
+        :param line_no: The line of the blackboard on which to draw the text.
+        """
+        text_image = self.screen.get_text(text, self.chalk, self.key)
+        self.image.blit(text_image, (self.image.scale_length(x_offset), self.image.scale_length(8 * line_no)))
 
     def newline(self):
         """Start a new line on the blackboard."""
@@ -322,6 +346,7 @@ class Blackboard:
         :param column: The column to wipe.
         """
         self.image.scale_blit(self.clean_image.surface, (column, 0), (column, 0, 1, self.height))
+        self.screen.invalidate((self.x + column, self.y), self.screen.scale_coords((1, self.height)))
 
     def wipe(self, column):
         """Wipe a column of the blackboard clean.
@@ -347,6 +372,7 @@ class Blackboard:
         self.writer = None
         if blit:
             self.image.blit(self.clean_image.surface, (0, 0))
+            self.screen.invalidate((self.x, self.y), self.image.get_size())
         self.wiped_columns = []
 
     def beside(self, character):
@@ -39,6 +39,9 @@ Pyskool will search the following directories for 'pyskool.ini' and the
 '{images}', '{sounds}' and '{ini}' subdirectories:
 """.lstrip()
 
+# The hash seed used when recording or replaying a game
+HASH_SEED = '0'
+
 prog = os.path.basename(sys.argv[0].lower())
 
 def info(text):
@@ -92,6 +95,8 @@ def main(scripts_dir):
         help="create the sound files required by the game and exit")
     group.add_argument("--force", dest="force", action="store_true",
         help="overwrite existing images, ini files and sound files")
+    group.add_argument("--headless", dest="headless", action="store_true",
+        help="run the game without a display or sound, as fast as possible")
     group.add_argument("-i", "--inidir", dest="inidir",
         help="read ini files from this directory instead of %s" % default_ini_dir)
     group.add_argument("-l", "--load", dest="savefile",
@@ -102,18 +107,35 @@ def main(scripts_dir):
         help="start the game quickly")
     group.add_argument("-r", "--load-last", dest="savedir",
         help="load the most recently saved game in the specified directory")
+    group.add_argument("--record", dest="record", metavar="FILE",
+        help="record the keys pressed during the game to FILE")
+    group.add_argument("--replay", dest="replay", metavar="FILE",
+        help="replay a game recorded in FILE without a display or sound, as fast as possible")
     group.add_argument("--sample-rate", dest="sample_rate", metavar="RATE", type=int, default=44100,
         help="set the sample rate of the sound files created by --create-sounds (default: 44100)")
     group.add_argument("-s", "--scale", dest="scale", type=int,
         help="scale graphics by this factor (1=original Speccy size)")
     group.add_argument("--search-dirs", dest="search_dirs", action="store_true",
         help="show the locations that Pyskool searches for data files and exit")
+    group.add_argument("--seed", dest="seed", metavar="N", type=int,
+        help="seed the random number generator with N")
     group.add_argument("--setup", dest="setup", action="store_true",
         help="create the images, ini files and sound files required by the game and exit")
+    group.add_argument("--ticks", dest="ticks", metavar="N", type=int, default=0,
+        help="stop after N ticks in headless mode (default: 0, run until the game ends)")
+    group.add_argument("--trace", dest="trace", metavar="FILE",
+        help="write the state of the game to FILE after every tick")
     options, unknown_args = parser.parse_known_args()
     if unknown_args:
         parser.exit(2, parser.format_help())
 
+    # A game can be recorded and replayed exactly only if sets and
+    # dictionaries are iterated over in the same order every time, which
+    # requires a fixed hash seed
+    if (options.record or options.replay) and os.environ.get('PYTHONHASHSEED') != HASH_SEED:
+        os.environ['PYTHONHASHSEED'] = HASH_SEED
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
     # Set the search path for 'pyskool.ini', the 'images' directory, the
     # 'sounds' directory, and the 'ini' directory
     cwd = os.getcwd()
@@ -229,6 +251,16 @@ def main(scripts_dir):
         else:
             info("No saved games found in %s" % options.savedir)
 
+    # Look for a recorded game to replay (if specified on the command line)
+    if options.replay:
+        if not os.path.isfile(options.replay):
+            error('%s: file not found' % options.replay)
+        options.replay = os.path.abspath(options.replay)
+    if options.record:
+        options.record = os.path.abspath(options.record)
+    if options.trace:
+        options.trace = os.path.abspath(options.trace)
+
     # Change to the directory where games will be saved/loaded and screenshots
     # will be dumped
     os.chdir(user_dir)
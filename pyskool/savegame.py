@@ -0,0 +1,562 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Richard Dymond (rjdymond@gmail.com)
+#
+# This file is part of Pyskool.
+#
+# Pyskool is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# Pyskool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Pyskool. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Save and restore the state of a game.
+
+A saved game contains only the state that changes while the game is being
+played (the whereabouts and animatory states of the characters, their command
+lists, the skool clock, the contents of the blackboards, the score, and so
+on). Everything else is rebuilt from the ini files before the saved state is
+applied. The state is stored in a compact binary format:
+
+* a header (:data:`MAGIC`, the format version, and a fingerprint of the objects
+  in the skool that were built from the ini files)
+* the state itself (compressed with zlib), which consists of the IDs and
+  initial locations of any mortal mice, a table of attribute names, the
+  values of those attributes for each object in the skool, and the contents
+  of any speech bubbles
+
+Objects built from the ini files (characters, rooms, doors, floors and so on)
+are referred to by their index in a list of all such objects; objects created
+while the game is being played (commands, lessons, locations and so on) are
+stored as a class name and the values of their attributes.
+"""
+
+import struct
+import sys
+import zlib
+
+from .barrier import Door
+from .bike import Bike
+from .character import Character
+from .desklid import DeskLid
+from .eric import Eric
+from .graphics import Screen
+from .input import Keyboard
+from .lesson import QAGenerator
+from .mutable import Flashable, Cup, Bike as ChainedBike
+from .plant import Plant
+from .room import Blackboard, Chair, Desk
+from .scoreboard import Scoreboard
+from .skool import Skool
+from .stinkbomb import Stinkbomb
+from .timetable import Timetable
+from .water import Water
+from .animal import Frog
+
+#: The first four bytes of every saved game file.
+MAGIC = b'PySk'
+
+#: The version of the saved game format.
+FORMAT = 1
+
+#: The attributes to save for each type of object built from the ini files.
+STATE = (
+    (Skool, ('signals', 'game_over', 'home_room', 'lesson', 'locked', 'suspended', 'pre_resume', 'pre_resume_args', 'inverse', 'draw_index', 'shield_mode', 'safe_combination', 'bike_combination', 'storeroom_combination', 'play_tune', 'clear_score')),
+    (Timetable, ('counter', 'index', 'lesson_id', 'ticking')),
+    (Scoreboard, ('score', 'lines', 'hiscore')),
+    (Screen, ('column', 'pending_scroll')),
+    (Keyboard, ('writing',)),
+    (Character, ('x', 'y', 'direction', 'vertical_direction', 'action', 'animatory_state', 'previous_as', 'speed', 'fixed_speed', 'speed_change_delay', 'walk_delay', 'action_delay', 'staircase', 'barrier', 'room', 'floor', 'command_list', 'wiping_board', 'lines_message', 'message_box_coords', 'come_along_index', 'changes_seats', 'kisses', 'stop_eric', 'paused', 'lesson', 'qa_generator', 'special_answer', 'safe_secret', 'bike_secret', 'storeroom_secret')),
+    (Eric, ('writing', 'frozen', 'understood', 'controller', 'lines_delay', 'last_lines_giver', 'inventory', 'mice', 'last_bike_key', 'bike_key', 'bike', 'started_pedalling', 'sitting_on_saddle', 'expelled', 'hide_coords', 'base_location')),
+    (Bike, ('momentum',)),
+    (DeskLid, ('desk', 'opener')),
+    (Frog, ('falling', 'trapped')),
+    (Plant, ('growing', 'head_height')),
+    (Stinkbomb, ('phase_index', 'smelt', 'animatory_states')),
+    (Water, ('liquid',)),
+    (Door, ('shut', 'auto_shut_timer')),
+    (Flashable, ('flashing',)),
+    (Cup, ('contents', 'frogs')),
+    (ChainedBike, ('chained',)),
+    (Desk, ('contents',)),
+    (Chair, ('occupant',)),
+    (Blackboard, ('lines', 'writer', 'wiped_columns')),
+    (QAGenerator, ('remaining', 'special_qa_group', 'special_qa_pair_index', 'special_answer_index'))
+)
+
+# Value tags
+NONE = 0
+TRUE = 1
+FALSE = 2
+INT = 3
+FLOAT = 4
+STRING = 5
+STRING_REF = 6
+TUPLE = 7
+LIST = 8
+DICT = 9
+SET = 10
+STATIC = 11
+OBJECT = 12
+OBJECT_REF = 13
+METHOD = 14
+MISSING = 15
+# Integers from 0 to 127 are stored in a single byte: SMALL_INT + n
+SMALL_INT = 128
+
+_PACKAGE = __name__.rpartition('.')[0]
+
+try:
+    _INT_TYPES = (int, long)
+    _TEXT_TYPE = unicode
+except NameError:
+    _INT_TYPES = (int,)
+    _TEXT_TYPE = str
+
+_FLOAT = struct.Struct('<d')
+_HEADER = struct.Struct('<4sHI')
+
+_MISSING = object()
+
+_ATTRIBUTE_NAMES = {}
+
+class _Blank:
+    pass
+
+def _get_static_objects(skool):
+    """Return a list of the objects in the skool that are built from the ini
+    files, in a fixed order.
+
+    :type skool: :class:`~pyskool.skool.Skool`
+    :param skool: The skool.
+    """
+    cast = skool.cast
+    objects = [skool, skool.timetable, skool.scoreboard, skool.screen, cast, cast.eric.keyboard, skool.assembly_message_generator]
+    mice = cast.get_mortal_mice()
+    objects.extend(c for c in cast.everything if c not in mice)
+    for room_id in sorted(skool.rooms):
+        room = skool.rooms[room_id]
+        objects.append(room)
+        if room.blackboard:
+            objects.append(room.blackboard)
+        objects.extend(room.chairs)
+        objects.extend(room.desks)
+    for objs in (skool.barriers, skool.floors, skool.staircases, skool.locations, skool.cups, skool.plant_pots, cast.command_lists):
+        objects.extend(objs[k] for k in sorted(objs))
+    objects.extend(skool.no_go_zones)
+    objects.extend(skool.shields)
+    objects.extend((skool.safe, skool.bike))
+    objects.extend(c.qa_generator for c in cast.character_list)
+    unique = []
+    indexes = {}
+    for obj in objects:
+        if obj is not None and id(obj) not in indexes:
+            indexes[id(obj)] = len(unique)
+            unique.append(obj)
+    return unique
+
+def get_fingerprint(skool):
+    """Return a fingerprint of the objects in a skool that were built from
+    the ini files. Two skools built from the same ini files have the same
+    fingerprint.
+
+    :type skool: :class:`~pyskool.skool.Skool`
+    :param skool: The skool.
+    """
+    return _get_fingerprint(_get_static_objects(skool))
+
+def _get_fingerprint(objects):
+    """Return a number that identifies the set of objects built from the ini
+    files. A saved game can be restored only to a skool with the same
+    fingerprint.
+
+    :param objects: The objects.
+    """
+    names = []
+    for obj in objects:
+        # The headless screen and keyboard are interchangeable with the real
+        # ones
+        if isinstance(obj, Screen):
+            names.append('Screen')
+        elif isinstance(obj, Keyboard):
+            names.append('Keyboard')
+        else:
+            names.append(type(obj).__name__)
+    names = ','.join(names)
+    return zlib.crc32(names.encode('ascii')) & 0xffffffff
+
+def _get_attribute_names(obj):
+    """Return a tuple of the names of the attributes to save for an object.
+
+    :param obj: The object.
+    """
+    names = _ATTRIBUTE_NAMES.get(type(obj))
+    if names is None:
+        names = ()
+        for cls, attrs in STATE:
+            if isinstance(obj, cls):
+                names += attrs
+        _ATTRIBUTE_NAMES[type(obj)] = names
+    return names
+
+class _Writer:
+    """Encodes values for a saved game.
+
+    :param objects: The objects built from the ini files.
+    """
+    def __init__(self, objects):
+        self.data = bytearray()
+        self.static = dict((id(obj), index) for index, obj in enumerate(objects))
+        self.strings = {}
+        self.memo = {}
+
+    def write_number(self, n):
+        """Write a non-negative integer."""
+        while n > 127:
+            self.data.append(n & 127 | 128)
+            n >>= 7
+        self.data.append(n)
+
+    def write(self, value):
+        """Write a value.
+
+        :param value: The value.
+        """
+        data = self.data
+        value_type = type(value)
+        if value_type is int and 0 <= value < 128:
+            data.append(SMALL_INT + value)
+        elif value_type is tuple or value_type is list:
+            data.append(TUPLE if value_type is tuple else LIST)
+            self.write_number(len(value))
+            for item in value:
+                self.write(item)
+        elif value is None:
+            data.append(NONE)
+        elif value is True:
+            data.append(TRUE)
+        elif value is False:
+            data.append(FALSE)
+        elif isinstance(value, _INT_TYPES):
+            if 0 <= value < 128:
+                data.append(SMALL_INT + value)
+            else:
+                data.append(INT)
+                self.write_number(value * 2 if value >= 0 else -value * 2 - 1)
+        elif isinstance(value, float):
+            data.append(FLOAT)
+            data.extend(_FLOAT.pack(value))
+        elif isinstance(value, (str, _TEXT_TYPE)):
+            # Each distinct string is written only once; subsequent
+            # occurrences refer back to it
+            if value in self.strings:
+                data.append(STRING_REF)
+                self.write_number(self.strings[value])
+            else:
+                self.strings[value] = len(self.strings)
+                if isinstance(value, _TEXT_TYPE):
+                    value = value.encode('utf-8')
+                data.append(STRING)
+                self.write_number(len(value))
+                data.extend(value)
+        elif isinstance(value, (tuple, list, set, frozenset)):
+            if isinstance(value, tuple):
+                data.append(TUPLE)
+            elif isinstance(value, list):
+                data.append(LIST)
+            else:
+                data.append(SET)
+            self.write_number(len(value))
+            for item in value:
+                self.write(item)
+        elif isinstance(value, dict):
+            data.append(DICT)
+            self.write_number(len(value))
+            for k, v in value.items():
+                self.write(k)
+                self.write(v)
+        elif id(value) in self.static:
+            data.append(STATIC)
+            self.write_number(self.static[id(value)])
+        elif id(value) in self.memo:
+            data.append(OBJECT_REF)
+            self.write_number(self.memo[id(value)])
+        elif hasattr(value, '__self__') and hasattr(value, '__func__'):
+            data.append(METHOD)
+            self.write(value.__self__)
+            self.write(value.__func__.__name__)
+        elif hasattr(value, '__dict__') and type(value).__module__.startswith(_PACKAGE + '.'):
+            self.memo[id(value)] = len(self.memo)
+            data.append(OBJECT)
+            self.write(type(value).__module__[len(_PACKAGE) + 1:])
+            self.write(type(value).__name__)
+            self.write(value.__dict__)
+        else:
+            raise TypeError('Cannot save {0!r}'.format(value))
+
+class _Reader:
+    """Decodes values from a saved game.
+
+    :param data: The encoded values.
+    :param objects: The objects built from the ini files.
+    """
+    def __init__(self, data, objects):
+        self.data = bytearray(data)
+        self.index = 0
+        self.objects = objects
+        self.strings = []
+        self.memo = []
+
+    def read_number(self):
+        """Read a non-negative integer."""
+        data = self.data
+        n = shift = 0
+        while True:
+            byte = data[self.index]
+            self.index += 1
+            n |= (byte & 127) << shift
+            if byte < 128:
+                return n
+            shift += 7
+
+    def read(self):
+        """Read a value."""
+        tag = self.data[self.index]
+        self.index += 1
+        if tag >= SMALL_INT:
+            return tag - SMALL_INT
+        if tag == STRING_REF:
+            return self.strings[self.read_number()]
+        if tag == STATIC:
+            return self.objects[self.read_number()]
+        if tag == NONE:
+            return None
+        if tag == TRUE:
+            return True
+        if tag == FALSE:
+            return False
+        if tag == INT:
+            n = self.read_number()
+            return -(n + 1 >> 1) if n & 1 else n >> 1
+        if tag == STRING:
+            length = self.read_number()
+            self.index += length
+            value = bytes(self.data[self.index - length:self.index])
+            if _TEXT_TYPE is str:
+                value = value.decode('utf-8')
+            self.strings.append(value)
+            return value
+        if tag == TUPLE:
+            return tuple([self.read() for i in range(self.read_number())])
+        if tag == LIST:
+            return [self.read() for i in range(self.read_number())]
+        if tag == SET:
+            return set([self.read() for i in range(self.read_number())])
+        if tag == DICT:
+            d = {}
+            for i in range(self.read_number()):
+                k = self.read()
+                d[k] = self.read()
+            return d
+        if tag == OBJECT_REF:
+            return self.memo[self.read_number()]
+        if tag == OBJECT:
+            obj = self._new(self.read(), self.read())
+            self.memo.append(obj)
+            obj.__dict__.update(self.read())
+            return obj
+        if tag == METHOD:
+            obj = self.read()
+            return getattr(obj, self.read())
+        if tag == FLOAT:
+            self.index += _FLOAT.size
+            return _FLOAT.unpack(bytes(self.data[self.index - _FLOAT.size:self.index]))[0]
+        raise ValueError('Unknown tag {0} at offset {1}'.format(tag, self.index - 1))
+
+    def _new(self, module_name, class_name):
+        """Create an instance of a class without initialising it. Only classes
+        defined in a Pyskool module that has already been imported may be
+        instantiated in this way.
+
+        :param module_name: The name of the module (relative to the package).
+        :param class_name: The name of the class.
+        """
+        module = sys.modules.get('{0}.{1}'.format(_PACKAGE, module_name))
+        cls = getattr(module, class_name, None)
+        if not isinstance(cls, type) and type(cls) is not type(_Blank):
+            raise ValueError('Unknown class: {0}.{1}'.format(module_name, class_name))
+        try:
+            return object.__new__(cls)
+        except TypeError:
+            obj = _Blank()
+            obj.__class__ = cls
+            return obj
+
+def save(skool, fname, compression):
+    """Save the state of a game.
+
+    :type skool: :class:`~pyskool.skool.Skool`
+    :param skool: The skool.
+    :param fname: The name of the file to save to.
+    :param compression: The compression level (0-9).
+    """
+    write(snapshot(skool), fname, compression)
+
+def snapshot(skool):
+    """Capture the state of a game. The snapshot is independent of the skool,
+    so it may be written to a file (by :func:`write`) while the game carries
+    on, without the file recording a mixture of the state before and after a
+    tick.
+
+    :type skool: :class:`~pyskool.skool.Skool`
+    :param skool: The skool.
+    :return: The snapshot (a byte string).
+    """
+    objects = _get_static_objects(skool)
+    mice = skool.cast.get_mortal_mice()
+    writer = _Writer(objects + mice)
+    writer.write([(m.character_id, m.initial_location.coords()) for m in mice])
+    layouts = {}
+    values = []
+    for obj in objects + mice:
+        names = _get_attribute_names(obj)
+        layout = layouts.setdefault(names, len(layouts))
+        values.append((layout, [obj.__dict__.get(name, _MISSING) for name in names]))
+    writer.write(sorted(layouts, key=layouts.get))
+    for layout, attrs in values:
+        writer.write_number(layout)
+        for value in attrs:
+            if value is _MISSING:
+                writer.data.append(MISSING)
+            else:
+                writer.write(value)
+    # Speech bubbles are not saved as such, but rebuilt from the words being
+    # spoken and the portion of them being displayed
+    speech = []
+    for index, obj in enumerate(objects + mice):
+        if isinstance(obj, Character) and obj.bubble and obj.speech_bubble:
+            bubble = obj.speech_bubble
+            speech.append((index, obj.bubble[:2], bubble.words, bubble.lip_pos, bubble.shift))
+    writer.write(speech)
+    return _HEADER.pack(MAGIC, FORMAT, _get_fingerprint(objects)) + bytes(writer.data)
+
+def write(data, fname, compression):
+    """Compress a snapshot of the state of a game and write it to a file.
+
+    :param data: The snapshot (as returned by :func:`snapshot`).
+    :param fname: The name of the file to save to.
+    :param compression: The compression level (0-9).
+    """
+    with open(fname, 'wb') as f:
+        f.write(data[:_HEADER.size])
+        f.write(zlib.compress(data[_HEADER.size:], compression))
+
+def load(skool, fname):
+    """Restore the state of a saved game to a skool that has been built from
+    the same ini files as the skool from which the game was saved.
+
+    :type skool: :class:`~pyskool.skool.Skool`
+    :param skool: The skool.
+    :param fname: The name of the file to load from.
+    """
+    with open(fname, 'rb') as f:
+        data = f.read()
+    _check_header(skool, data)
+    restore(skool, data[:_HEADER.size] + zlib.decompress(data[_HEADER.size:]))
+
+def _check_header(skool, data):
+    """Check the header of a saved game or snapshot, and return the objects in
+    the skool that were built from the ini files.
+
+    :type skool: :class:`~pyskool.skool.Skool`
+    :param skool: The skool.
+    :param data: The saved game or snapshot.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError('File too short')
+    magic, version, fingerprint = _HEADER.unpack(data[:_HEADER.size])
+    if magic != MAGIC:
+        raise ValueError('Not a saved game')
+    if version != FORMAT:
+        raise ValueError('Unsupported saved game format: {0}'.format(version))
+    objects = _get_static_objects(skool)
+    if fingerprint != _get_fingerprint(objects):
+        raise ValueError('Saved game does not match the skool')
+    return objects
+
+def restore(skool, data):
+    """Restore the state of a game from a snapshot taken by :func:`snapshot`.
+    The whole snapshot is decoded before any of it is applied, so a snapshot
+    that turns out to be corrupt leaves the skool as it was.
+
+    :type skool: :class:`~pyskool.skool.Skool`
+    :param skool: The skool.
+    :param data: The snapshot.
+    """
+    objects = _check_header(skool, data)
+    try:
+        mice, values, speech = _decode(skool, data[_HEADER.size:], objects)
+    except (IndexError, KeyError, TypeError, AttributeError, UnicodeDecodeError, struct.error) as e:
+        raise ValueError('Corrupt saved game: {0}'.format(e))
+
+    cast = skool.cast
+    for mouse in cast.get_mortal_mice():
+        cast.kill_mouse(mouse)
+    for mouse in mice:
+        cast.insert_mouse(mouse)
+    for obj, attrs in values:
+        for name, value in attrs:
+            if value is _MISSING:
+                obj.__dict__.pop(name, None)
+            else:
+                setattr(obj, name, value)
+    for character in cast.everything:
+        character.remove_bubble()
+    for character, (x, y), words, lip_pos, shift in speech:
+        character.bubble = [x, y, None]
+        character.speech_bubble = skool.screen.get_speech_bubble(words, lip_pos)
+        character.bubble[2] = character.speech_bubble.show(shift)[0]
+
+def _decode(skool, data, objects):
+    """Decode the body of a snapshot without applying any of it. Any mortal
+    mice in the snapshot are created, but not added to the game.
+
+    :type skool: :class:`~pyskool.skool.Skool`
+    :param skool: The skool.
+    :param data: The body of the snapshot.
+    :param objects: The objects in the skool that were built from the ini
+                    files.
+    :return: A 3-tuple, `(mice, values, speech)`: the mortal mice, a list of
+             `(object, attributes)` tuples (where `attributes` is a list of
+             `(name, value)` tuples, and `value` is `_MISSING` for an
+             attribute that should be deleted), and a list of `(character,
+             (x, y), words, lip_pos, shift)` tuples for the speech bubbles.
+    """
+    reader = _Reader(data, objects)
+    cast = skool.cast
+    mice = [cast.create_mortal_mouse(mouse_id, location) for mouse_id, location in reader.read()]
+    objects = objects + mice
+    reader.objects = objects
+    layouts = reader.read()
+    values = []
+    for obj in objects:
+        attrs = []
+        for name in layouts[reader.read_number()]:
+            if reader.data[reader.index] == MISSING:
+                reader.index += 1
+                attrs.append((name, _MISSING))
+            else:
+                attrs.append((name, reader.read()))
+        values.append((obj, attrs))
+    speech = []
+    for index, xy, words, lip_pos, shift in reader.read():
+        speech.append((objects[index], xy, words, lip_pos, shift))
+    if reader.index != len(reader.data):
+        raise ValueError('Corrupt saved game: unexpected data at offset {0}'.format(reader.index))
+    return mice, values, speech
@@ -31,6 +31,7 @@ from .staircase import Staircase
 from .scoreboard import Scoreboard
 from .location import Location
 from .timetable import Timetable
+from .spatial import SpatialIndex
 from . import items
 from . import sound
 from . import graphics
@@ -76,6 +77,7 @@ class Skool:
         self.staircases = {}
         self.floors = {}
         self.routes = {}
+        self.route_table = {}
         self.no_go_zones = []
         self.assembly_message_generator = AssemblyMessageGenerator()
         self.shields = []
@@ -84,6 +86,7 @@ class Skool:
         self.bike_combination = None
         self.storeroom_combination = None
         self.draw_index = 0
+        self.frame_skipped = False
         self.signals = {}
         self.messages = {}
         self.cups = {}
@@ -112,6 +115,8 @@ class Skool:
         self.drinks_cabinet_door_id = config.get('DrinksCabinetDoorId', 'DrinksCabinet')
         self.playground = config.get('Playground')
         self.location_marker = config.get('LocationMarker', 'Location:')
+        self.spatial_index = config.get('SpatialIndex', 1)
+        self.index = None
 
         self.inverse = 0
         self.game_over = False
@@ -222,6 +227,9 @@ class Skool:
             return None
         if home_floor is dest_floor:
             return None
+        staircase = self.route_table.get(home_floor.floor_id, {}).get(dest_floor.floor_id)
+        if staircase:
+            return staircase
         routes = self.routes[home_floor.floor_id]
         staircase_id = routes.get(dest_floor.floor_id, routes['*'])
         return self.staircases[staircase_id]
@@ -259,6 +267,8 @@ class Skool:
         """Return whether there is a clear line of sight between two points
         (that is, there are no walls between them).
         """
+        if self.index:
+            return self.index.line_of_sight(a, b)
         return not any(wall.separates(a, b) for wall in self.walls.values())
 
     def move_characters(self):
@@ -370,6 +380,18 @@ class Skool:
     #//////////////////////////////////////////////////////////////////////////
     # Skool construction
     #//////////////////////////////////////////////////////////////////////////
+    def build_index(self):
+        """Build the spatial index that is used to answer location queries
+        (such as which room or floor a character is on). If the
+        `SpatialIndex` configuration parameter is 0, no index is built, and
+        location queries are answered by scanning every room, staircase,
+        floor, barrier and no-go zone in the skool instead.
+        """
+        if self.spatial_index:
+            self.index = SpatialIndex(self)
+        else:
+            self.index = None
+
     def add_location(self, location_id, coords):
         """Add a named location. Named locations can be used by the
         :class:`~pyskool.ai.GoTo` command.
@@ -549,6 +571,58 @@ class Skool:
         for dest_floor_id in dest_floor_ids:
             self.routes[home_floor_id][dest_floor_id] = staircase_id
 
+    def build_route_table(self):
+        """Build the table of staircases that must be ascended or descended
+        next to get from any floor to any other floor, and check that every
+        floor can be reached from every other floor by following the routes
+        defined in the skool. Any floor that cannot be reached, and any route
+        that goes round in circles, is reported.
+        """
+        self.route_table = {}
+        for home_floor_id in self.floors:
+            routes = self.routes.get(home_floor_id, {})
+            table = self.route_table[home_floor_id] = {}
+            for dest_floor_id in self.floors:
+                if dest_floor_id != home_floor_id:
+                    staircase_id = routes.get(dest_floor_id, routes.get('*'))
+                    if staircase_id in self.staircases:
+                        table[dest_floor_id] = self.staircases[staircase_id]
+                    elif staircase_id is not None:
+                        debug.log("Route from floor '%s' to floor '%s': staircase '%s' not found" % (home_floor_id, dest_floor_id, staircase_id))
+        for home_floor in self.floors.values():
+            for dest_floor in self.floors.values():
+                self._check_route(home_floor, dest_floor)
+
+    def _check_route(self, home_floor, dest_floor):
+        """Check that the destination floor can be reached from the home floor
+        by following the routes in the route table, and report the problem if
+        it can't.
+
+        :param home_floor: The home floor.
+        :param dest_floor: The destination floor.
+        """
+        floor = home_floor
+        visited = [floor]
+        while floor is not dest_floor:
+            staircase = self.route_table[floor.floor_id].get(dest_floor.floor_id)
+            if staircase is None:
+                debug.log("No route from floor '%s' to floor '%s'" % (floor.floor_id, dest_floor.floor_id))
+                return
+            if floor.contains_location(*staircase.bottom.coords()):
+                floor = self.floor_at(*staircase.top.coords())
+            elif floor.contains_location(*staircase.top.coords()):
+                floor = self.floor_at(*staircase.bottom.coords())
+            else:
+                debug.log("Route from floor '%s' to floor '%s': staircase at %s-%s does not start on floor '%s'" % (home_floor.floor_id, dest_floor.floor_id, staircase.bottom, staircase.top, floor.floor_id))
+                return
+            if floor is None:
+                debug.log("Route from floor '%s' to floor '%s': staircase at %s-%s does not lead to a floor" % (home_floor.floor_id, dest_floor.floor_id, staircase.bottom, staircase.top))
+                return
+            if floor in visited:
+                debug.log("Route from floor '%s' to floor '%s' goes round in circles: %s" % (home_floor.floor_id, dest_floor.floor_id, ', '.join([f.floor_id for f in visited + [floor]])))
+                return
+            visited.append(floor)
+
     def add_blackboard(self, room_id, top_left, size, chalk):
         """Add a blackboard to a room in the skool.
 
@@ -761,6 +835,7 @@ class Skool:
         else:
             self.ink.scale_blit(images[0].surface, coords)
             self.paper.scale_blit(images[1].surface, coords)
+        self.screen.invalidate(coords, images[0].get_size())
 
     def get_width(self):
         """Return the width of the play area (in pixels)."""
@@ -772,13 +847,14 @@ class Skool:
         surface = self.skool or self.ink
         return surface.get_height()
 
-    def draw(self, update=True):
+    def draw(self, update=True, skip=False):
         """Draw the skool.
 
         :param update: Whether to update the screen after drawing.
+        :param skip: If `True`, skip drawing this frame; flashing shields and
+                     safes are still updated, so that they flash at the same
+                     rate whether or not frames are being skipped.
         """
-        skool_images = (self.skool, self.ink, self.paper)
-        cast_images = self.cast.get_images()
         inverse = self.draw_index >= self.flash_cycle // 2
         flash = inverse ^ self.inverse
         self.inverse = inverse
@@ -788,9 +864,30 @@ class Skool:
                     self.draw_mutable(*shield.get_images(inverse))
             if self.safe and self.safe.flashing:
                 self.draw_mutable(*self.safe.get_images(inverse))
-        self.screen.draw(skool_images, cast_images, self.cast.get_speech_bubbles(), update)
+        self.screen.advance_scroll()
+        if skip:
+            self.frame_skipped = True
+        else:
+            self._draw_frame(update)
         self.draw_index = (self.draw_index + 1) % self.flash_cycle
 
+    def _draw_frame(self, update):
+        """Draw the play area, the cast and the speech bubbles on the screen.
+
+        :param update: Whether to update the screen after drawing.
+        """
+        skool_images = (self.skool, self.ink, self.paper)
+        self.screen.draw(skool_images, self.cast.get_images(), self.cast.get_speech_bubbles(), update)
+        self.frame_skipped = False
+
+    def draw_skipped_frame(self):
+        """Draw the skool if the last frame was skipped, so that the screen is
+        up to date before something (such as a message box) is drawn on top of
+        it.
+        """
+        if self.frame_skipped:
+            self._draw_frame(True)
+
     def scroll_on(self, clock):
         """Scroll the skool into view across the screen.
 
@@ -862,12 +959,30 @@ class Skool:
 
           * set the screen size and background colour
           * set the window icon and title
+          * rebuild the skool images and sprites
           * print the logo, score box, lesson box and inventories
           * restore the blackboard images
-          * redraw the bike, cups, doors, and windows
+          * redraw the bike, cups, doors, windows, shields and safe
         """
         self.screen.setup(True)
         self._build_images()
+        self._redraw()
+        self.cast.restore()
+
+    def refresh(self):
+        """Perform tasks required immediately after rewinding the game. These
+        are the same as the tasks performed by :meth:`restore`, except that
+        the screen size is left alone and no images are rebuilt.
+        """
+        self.screen.setup()
+        self._redraw()
+        self.cast.eric.print_inventory()
+        self.cast.eric.print_mouse_inventory()
+
+    def _redraw(self):
+        """Print the score box and lesson box, restore the blackboard images,
+        and redraw the bike, cups, doors, windows, shields and safe.
+        """
         self.update_score_box()
         self.print_lesson()
         for room in self.rooms.values():
@@ -880,7 +995,9 @@ class Skool:
             self.draw_mutable(*window.get_images())
         for door in self.doors.values():
             self.draw_mutable(*door.get_images())
-        self.cast.restore()
+        for flashable in self.shields + [self.safe]:
+            if flashable:
+                self.draw_mutable(*flashable.get_images(flashable.flashing and self.inverse))
 
     def update_score_box(self):
         """Print the score, lines total and hi-score."""
@@ -1026,6 +1143,8 @@ class Skool:
         :type character: :class:`~pyskool.character.Character`
         :param character: The character to check.
         """
+        if self.index:
+            return self.index.room(character)
         for room in self.rooms.values():
             if room.contains(character):
                 return room
@@ -1039,6 +1158,8 @@ class Skool:
                          check for a staircase.
         :return: The staircase, or `None` if there is none.
         """
+        if self.index:
+            return self.index.staircase(character, distance)
         for staircase in self.staircases.values():
             if staircase.contains(character, distance):
                 return staircase
@@ -1050,6 +1171,8 @@ class Skool:
         :type character: :class:`~pyskool.character.Character`
         :param character: The character.
         """
+        if self.index:
+            return self.index.on_staircase(character)
         return any(staircase.supports(character) for staircase in self.staircases.values())
 
     def floor(self, thing):
@@ -1059,6 +1182,8 @@ class Skool:
         :param thing: The character or thing.
         :return: The floor, or `None` is the character is not on a floor.
         """
+        if self.index:
+            return self.index.floor_at(thing.x, thing.y)
         for floor in self.floors.values():
             if floor.supports(thing):
                 return floor
@@ -1069,6 +1194,8 @@ class Skool:
         :type character: :class:`~pyskool.character.Character`
         :param character: The character.
         """
+        if self.index:
+            return self.index.floor_below(character)
         floor = None
         for f in self.floors.values():
             if f.below(character):
@@ -1082,6 +1209,8 @@ class Skool:
         :type character: :class:`~pyskool.character.Character`
         :param character: The character.
         """
+        if self.index:
+            return self.index.floor_at(character.x, character.y) is not None
         return any(floor.supports(character) for floor in self.floors.values())
 
     def floor_at(self, x, y):
@@ -1090,6 +1219,8 @@ class Skool:
         :param x: The x-coordinate of the location.
         :param y: The y-coordinate of the location.
         """
+        if self.index:
+            return self.index.floor_at(x, y)
         for floor in self.floors.values():
             if floor.contains_location(x, y):
                 return floor
@@ -1100,6 +1231,8 @@ class Skool:
         :param x: The x-coordinate of the location.
         :param y: The y-coordinate of the location.
         """
+        if self.index:
+            return self.index.in_no_go_zone(x, y)
         return any(zone.contains(x, y) for zone in self.no_go_zones)
 
     def in_playground(self, character):
@@ -1123,6 +1256,8 @@ class Skool:
         :return: The wall, window or door in front of the character, or `None`
                  if there is none.
         """
+        if self.index:
+            return self.index.barrier(character, distance)
         for barrier in self.barriers.values():
             if barrier.impedes(character, distance):
                 return barrier
@@ -1184,6 +1319,8 @@ class Skool:
         :param character: The character.
         :return: The window, or `None` if there is no window.
         """
+        if self.index:
+            return self.index.window(character)
         for window in self.windows.values():
             if window.impedes(character, force_shut=True):
                 return window
@@ -1246,6 +1383,7 @@ class Skool:
         :param pre_resume_args: The arguments for the `pre_resume` method.
         """
         if mode == sound.SUSPEND:
+            self.draw_skipped_frame()
             self.suspended = True
             self.pre_resume = pre_resume
             self.pre_resume_args = pre_resume_args
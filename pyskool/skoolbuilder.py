@@ -154,6 +154,7 @@ class SkoolBuilder(IniParser):
         self._parse_cups()
         self._parse_plants()
         self._parse_grass_messages()
+        self.skool.build_index()
 
     def _get_animation_phases(self, phase_set_id):
         """Return a list of animation phase elements from a section of the ini
@@ -360,6 +361,7 @@ class SkoolBuilder(IniParser):
             staircase_id = elements[-1]
             dest_floor_ids = elements[1:-1]
             self.skool.add_routes(home_floor_id, dest_floor_ids, staircase_id)
+        self.skool.build_route_table()
 
     def _parse_no_go_zones(self):
         """Parse the 'NoGoZones' section of the ini file."""
@@ -96,6 +96,7 @@ class Beeper:
         self.sounds = {}
         self.channel = None
         self.paused = False
+        self.recorder = None
         self.volume = min(max(0.0, config.get('Volume', 1.0)), 1.0)
 
     def __getstate__(self):
@@ -171,11 +172,14 @@ class Beeper:
         """Return whether a sound effect is being played at the moment in
         :data:`SUSPEND` mode.
         """
+        busy = False
         if self.channel:
-            if self.channel.get_busy():
-                return True
-            self.channel = None
-        return False
+            busy = self.channel.get_busy()
+            if not busy:
+                self.channel = None
+        if self.recorder:
+            self.recorder.record_sound(busy)
+        return busy
 
     def pause(self):
         """Pause the playing of any sound effect."""
@@ -206,3 +210,51 @@ class Beeper:
                      :meth:`play`).
         """
         self.play(random.choice(WALK_SOUNDS), mode)
+
+class HeadlessBeeper(Beeper):
+    """A maker of sound effects that never makes a sound. It is used when the
+    game is run in headless mode, so that the game never waits for a sound
+    effect to finish playing.
+
+    :param sounds_dir: The path to the `sounds` directory.
+    :type config: dict
+    :param config: Configuration parameters from the ini file.
+    """
+    def _load_sound(self, sound_id, sound_file):
+        """Do nothing (sound effects are never loaded in headless mode).
+
+        :param sound_id: The ID of the sound effect.
+        :param sound_file: The file name of the sound effect.
+        """
+        return
+
+class ReplayBeeper(HeadlessBeeper):
+    """A maker of sound effects that never makes a sound, but reports that a
+    sound effect is still playing whenever one was when a game was recorded.
+    It is used when a recorded game is replayed.
+
+    :param sounds_dir: The path to the `sounds` directory.
+    :type config: dict
+    :param config: Configuration parameters from the ini file.
+    :type player: :class:`~pyskool.replay.Player`
+    :param player: The player of the recording.
+    """
+    def __init__(self, sounds_dir, config, player):
+        HeadlessBeeper.__init__(self, sounds_dir, config)
+        self.player = player
+
+    def is_busy(self):
+        """Return whether a sound effect was playing at the corresponding
+        point in the recording.
+        """
+        return self.player.read_sound()
+
+    def pause(self):
+        """Mark the sound effect (if any) as paused."""
+        if not self.paused and self.is_busy():
+            self.paused = True
+
+    def unpause(self):
+        """Mark the sound effect (if any) as no longer paused."""
+        if self.paused and self.is_busy():
+            self.paused = False
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Richard Dymond (rjdymond@gmail.com)
+#
+# This file is part of Pyskool.
+#
+# Pyskool is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# Pyskool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Pyskool. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Defines the :class:`SpatialIndex` and :class:`PositionIndex` classes.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+class Row:
+    """A horizontal row of the skool divided into intervals, each of which is
+    occupied by at most one object. Where two or more objects overlap, the
+    one that comes first in `intervals` takes precedence.
+
+    :param intervals: A list of `(min_x, max_x, obj)` tuples.
+    """
+    def __init__(self, intervals):
+        self.starts = []
+        self.objects = []
+        bounds = set()
+        for min_x, max_x, obj in intervals:
+            bounds.update((min_x, max_x + 1))
+        for x in sorted(bounds):
+            occupant = None
+            for min_x, max_x, obj in intervals:
+                if min_x <= x <= max_x:
+                    occupant = obj
+                    break
+            if not self.objects or occupant is not self.objects[-1]:
+                self.starts.append(x)
+                self.objects.append(occupant)
+
+    def get(self, x):
+        """Return the object at a given x-coordinate in this row, or `None` if
+        there is none.
+
+        :param x: The x-coordinate.
+        """
+        index = bisect_right(self.starts, x) - 1
+        if index >= 0:
+            return self.objects[index]
+
+class BarrierTable:
+    """The barriers (walls, doors or windows) in the skool, sorted by
+    x-coordinate.
+
+    :param barriers: The barriers, in order of precedence.
+    """
+    def __init__(self, barriers):
+        entries = sorted((barrier.x, order, barrier) for order, barrier in enumerate(barriers))
+        self.xs = [e[0] for e in entries]
+        self.orders = [e[1] for e in entries]
+        self.barriers = [e[2] for e in entries]
+
+    def get_candidates(self, character, distance):
+        """Return the barriers that are close enough to a character (along the
+        x-axis) to impede him, in order of precedence. Whether each of these
+        barriers actually impedes the character depends on its vertical
+        extent and on whether it is open or shut.
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character.
+        :param distance: The maximum distance in front of the character at
+                         which a barrier should be considered an obstruction.
+        """
+        if character.direction > 0:
+            min_x, max_x = character.x + 1, character.x + distance + character.width - 1
+        elif character.direction < 0:
+            min_x, max_x = character.x - distance, character.x
+        else:
+            return ()
+        start = bisect_left(self.xs, min_x)
+        end = bisect_right(self.xs, max_x)
+        if end - start < 2:
+            return self.barriers[start:end]
+        return [self.barriers[i] for i in sorted(range(start, end), key=lambda i: self.orders[i])]
+
+class SpatialIndex:
+    """An index of the rooms, staircases, floors, barriers and no-go zones in
+    the skool that answers location queries without scanning all of them.
+
+    :type skool: :class:`~pyskool.skool.Skool`
+    :param skool: The skool to index.
+    """
+    def __init__(self, skool):
+        self.skool = skool
+        self.room_rows = {}
+
+        self.floor_rows = {}
+        floors = {}
+        for floor in skool.floors.values():
+            floors.setdefault(floor.y, []).append((floor.left_x, floor.right_x, floor))
+        for y, intervals in floors.items():
+            self.floor_rows[y] = Row(intervals)
+        self.floor_ys = sorted(self.floor_rows)
+
+        zones = {}
+        for zone in skool.no_go_zones:
+            for y in range(zone.top_y, zone.bottom_y + 1):
+                zones.setdefault(y, []).append((zone.min_x, zone.max_x, zone))
+        self.zone_rows = {}
+        for y, intervals in zones.items():
+            self.zone_rows[y] = Row(intervals)
+
+        # A staircase with an alias appears twice in skool.staircases
+        self.staircases = []
+        for staircase in skool.staircases.values():
+            if staircase not in self.staircases:
+                self.staircases.append(staircase)
+        self.staircase_points = {}
+        for staircase in self.staircases:
+            for x in range(min(staircase.bottom.x, staircase.top.x), max(staircase.bottom.x, staircase.top.x) + 1):
+                for y in range(staircase.top.y, staircase.bottom.y + 1):
+                    if staircase.contains_location(x, y):
+                        self.staircase_points.setdefault((x, y), []).append(staircase)
+
+        self.barriers = BarrierTable(list(skool.barriers.values()))
+        self.windows = BarrierTable(list(skool.windows.values()))
+
+        self.walls = sorted(skool.walls.values(), key=lambda wall: wall.x)
+        self.wall_xs = [wall.x for wall in self.walls]
+
+    def _get_room_rows(self, height):
+        """Return the rows of rooms that a character of a given height can be
+        in.
+
+        :param height: The height of the character.
+        """
+        if height not in self.room_rows:
+            rooms = {}
+            for room in self.skool.rooms.values():
+                for y in range(room.min_y, room.max_y - height + 2):
+                    rooms.setdefault(y, []).append((room.min_x, room.max_x, room))
+            self.room_rows[height] = {}
+            for y, intervals in rooms.items():
+                self.room_rows[height][y] = Row(intervals)
+        return self.room_rows[height]
+
+    def room(self, character):
+        """Return the room a character is in (or `None` if he is not in a
+        room).
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character to check.
+        """
+        row = self._get_room_rows(character.height).get(character.y)
+        if row:
+            return row.get(character.x)
+
+    def staircase(self, character, distance=0):
+        """Return the staircase that a character is on or close to.
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character to check.
+        :param distance: The maximum distance in front of the character to
+                         check for a staircase.
+        :return: The staircase, or `None` if there is none.
+        """
+        candidates = set()
+        for d in range(distance + 1):
+            candidates.update(self.staircase_points.get((character.x + d * character.direction, character.y), ()))
+        for staircase in sorted(candidates, key=self.staircases.index):
+            if staircase.contains(character, distance):
+                return staircase
+
+    def on_staircase(self, character):
+        """Return whether a character is on a step of any of the staircases in
+        the skool.
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character.
+        """
+        staircases = self.staircase_points.get((character.x, character.y), ())
+        return any(staircase.supports(character) for staircase in staircases)
+
+    def floor_at(self, x, y):
+        """Return the floor at a given location.
+
+        :param x: The x-coordinate of the location.
+        :param y: The y-coordinate of the location.
+        """
+        row = self.floor_rows.get(y)
+        if row:
+            return row.get(x)
+
+    def floor_below(self, character):
+        """Return the highest floor that is below a character.
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character.
+        """
+        for y in self.floor_ys[bisect_left(self.floor_ys, character.y):]:
+            floor = self.floor_rows[y].get(character.x)
+            if floor:
+                return floor
+
+    def in_no_go_zone(self, x, y):
+        """Return whether a given location is in a no-go zone.
+
+        :param x: The x-coordinate of the location.
+        :param y: The y-coordinate of the location.
+        """
+        row = self.zone_rows.get(y)
+        return bool(row and row.get(x))
+
+    def barrier(self, character, distance=0):
+        """Return the barrier (wall, window or door) that is in front of a
+        character.
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character.
+        :param distance: The maximum distance to check in front of the
+                         character.
+        :return: The wall, window or door in front of the character, or `None`
+                 if there is none.
+        """
+        for barrier in self.barriers.get_candidates(character, distance):
+            if barrier.impedes(character, distance):
+                return barrier
+
+    def line_of_sight(self, a, b):
+        """Return whether there is a clear line of sight between two points
+        (that is, there are no walls between them).
+
+        :type a: :class:`~pyskool.location.Location`
+        :param a: The first location.
+        :type b: :class:`~pyskool.location.Location`
+        :param b: The other location.
+        """
+        min_x, max_x = min(a.x, b.x), max(a.x, b.x)
+        start = bisect_right(self.wall_xs, min_x)
+        end = bisect_right(self.wall_xs, max_x)
+        if start < end:
+            min_y, max_y = min(a.y, b.y), max(a.y, b.y)
+            for wall in self.walls[start:end]:
+                if wall.top_y <= max_y and wall.bottom_y >= min_y:
+                    return False
+        return True
+
+    def window(self, character):
+        """Return the window that is in front of a character.
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character.
+        :return: The window, or `None` if there is no window.
+        """
+        for window in self.windows.get_candidates(character, 0):
+            if window.impedes(character, force_shut=True):
+                return window
+
+class PositionIndex:
+    """An index of characters arranged by location. Each character in the
+    index is kept in a bucket for the location `(x, y)` he currently occupies
+    and in a list (sorted by x-coordinate) for the row `y`; the buckets and
+    lists are updated (by :class:`~pyskool.character.Coordinate`) whenever a
+    character's coordinates change.
+    """
+    def __init__(self):
+        self.ordinals = {}
+        self.members = {}
+        self.locations = {}
+        self.cells = {}
+        self.rows = {}
+        self.next_ordinal = 0
+
+    def _insert(self, character):
+        x, y = location = (character.x, character.y)
+        self.locations[character] = location
+        self.cells.setdefault(location, set()).add(character)
+        insort(self.rows.setdefault(y, []), (x, self.ordinals[character]))
+
+    def _discard(self, character):
+        x, y = location = self.locations.pop(character)
+        cell = self.cells[location]
+        cell.discard(character)
+        if not cell:
+            del self.cells[location]
+        row = self.rows[y]
+        del row[bisect_left(row, (x, self.ordinals[character]))]
+        if not row:
+            del self.rows[y]
+
+    def add(self, character):
+        """Add a character to the index. Characters are returned by the
+        methods of this class in the order in which they were added.
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character to add.
+        """
+        self.ordinals[character] = self.next_ordinal
+        self.members[self.next_ordinal] = character
+        self.next_ordinal += 1
+        self._insert(character)
+        character.position_index = self
+
+    def remove(self, character):
+        """Remove a character from the index.
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character to remove.
+        """
+        self._discard(character)
+        del self.members[self.ordinals.pop(character)]
+        character.position_index = None
+
+    def update(self, character):
+        """Move a character to the buckets for his current location.
+
+        :type character: :class:`~pyskool.character.Character`
+        :param character: The character.
+        """
+        if self.locations.get(character) != (character.x, character.y):
+            self._discard(character)
+            self._insert(character)
+
+    def _sort(self, characters):
+        """Return a list of characters sorted into the order in which they
+        were added to the index.
+
+        :param characters: The characters.
+        """
+        if len(characters) < 2:
+            return list(characters)
+        return sorted(characters, key=self.ordinals.get)
+
+    def get(self, x, y):
+        """Return a list of the characters at a given location.
+
+        :param x: The x-coordinate of the location.
+        :param y: The y-coordinate of the location.
+        """
+        return self._sort(self.cells.get((x, y), ()))
+
+    def get_with_offsets(self, x, y, offsets):
+        """Return a list of the characters who could have some feature (such
+        as a head) at a given location, given the possible offsets of that
+        feature from a character's coordinates.
+
+        :param x: The x-coordinate of the location.
+        :param y: The y-coordinate of the location.
+        :param offsets: The possible offsets, `(dx, dy)`.
+        """
+        characters = set()
+        for dx, dy in offsets:
+            characters.update(self.cells.get((x - dx, y - dy), ()))
+        return self._sort(characters)
+
+    def get_in_range(self, min_x, max_x, min_y, max_y):
+        """Return a list of the characters in a rectangular region.
+
+        :param min_x: The x-coordinate of the left edge of the region.
+        :param max_x: The x-coordinate of the right edge of the region.
+        :param min_y: The y-coordinate of the top edge of the region.
+        :param max_y: The y-coordinate of the bottom edge of the region.
+        """
+        ordinals = []
+        for y in range(min_y, max_y + 1):
+            row = self.rows.get(y)
+            if row:
+                start = bisect_left(row, (min_x,))
+                end = bisect_left(row, (max_x + 1,))
+                ordinals.extend(ordinal for x, ordinal in row[start:end])
+        ordinals.sort()
+        return [self.members[ordinal] for ordinal in ordinals]
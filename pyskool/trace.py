@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Richard Dymond (rjdymond@gmail.com)
+#
+# This file is part of Pyskool.
+#
+# Pyskool is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# Pyskool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Pyskool. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Defines the :class:`Tracer` class, which writes a trace of the state of a game
+after every pass through the main loop, and some functions for reading and
+comparing traces.
+
+Each line of a trace contains the tick number, a digest of the state of the
+game, and the state itself (in JSON format). The state consists of:
+
+* the position, direction, animatory state and current command of every
+  character (including Eric, animals, pellets, water drops and so on)
+* whether each door and window is shut
+* the score, lines total and hi-score
+* the index of the current lesson in the timetable, the ID of the lesson, and
+  the lesson clock
+
+Two traces of games that were started with the same seed (or replayed from the
+same recording) should be identical, no matter which optimisations are
+switched on or off.
+"""
+
+import hashlib
+import json
+
+from . import debug
+
+def get_state(skool):
+    """Return the state of a game as a dictionary. (`utils/trace-game.py`
+    has a copy of this function, so that it can trace versions of Pyskool
+    that do not have it; the two must be kept in step.)
+
+    :type skool: :class:`~pyskool.skool.Skool`
+    :param skool: The skool.
+    """
+    characters = {}
+    for movable in skool.cast.movables:
+        stack = movable.command_list.stack
+        command = stack[-1].__class__.__name__ if stack else None
+        characters[movable.character_id] = [movable.x, movable.y, movable.direction, movable.animatory_state, command]
+    scoreboard = skool.scoreboard
+    timetable = skool.timetable
+    return {
+        'characters': characters,
+        'doors': dict((door_id, door.shut) for door_id, door in skool.doors.items()),
+        'windows': dict((window_id, window.shut) for window_id, window in skool.windows.items()),
+        'score': [scoreboard.score, scoreboard.lines, scoreboard.hiscore],
+        'timetable': [timetable.index, timetable.lesson_id, timetable.counter]
+    }
+
+def _encode(state):
+    """Return a state as a string in JSON format (with keys in a fixed order,
+    so that equal states are encoded identically).
+
+    :param state: The state.
+    """
+    return json.dumps(state, sort_keys=True, separators=(',', ':'))
+
+def get_digest(state):
+    """Return a digest of the state of a game (see :func:`get_state`).
+
+    :param state: The state.
+    """
+    return hashlib.md5(_encode(state).encode('utf-8')).hexdigest()
+
+class Tracer:
+    """Writes a trace of the state of a game after every pass through the
+    main loop.
+
+    :param fname: The name of the file to write the trace to.
+    """
+    def __init__(self, fname):
+        self.fname = fname
+        self.f = open(fname, 'w')
+        self.ticks = 0
+
+    def tick(self, skool):
+        """Write the state of the game to the trace. This method is called
+        after each pass through the main loop.
+
+        :type skool: :class:`~pyskool.skool.Skool`
+        :param skool: The skool.
+        """
+        self.ticks += 1
+        state = _encode(get_state(skool))
+        digest = hashlib.md5(state.encode('utf-8')).hexdigest()
+        self.f.write('%i %s %s\n' % (self.ticks, digest, state))
+
+    def close(self):
+        """Close the trace file."""
+        if self.f:
+            self.f.close()
+            self.f = None
+            debug.log('Traced %i ticks to %s' % (self.ticks, self.fname))
+
+def read_trace(fname):
+    """Read a trace written by a :class:`Tracer`, and generate a 3-tuple,
+    `(tick, digest, state)`, for each line.
+
+    :param fname: The name of the trace file.
+    """
+    with open(fname) as f:
+        for line in f:
+            tick, digest, state = line.split(' ', 2)
+            yield int(tick), digest, json.loads(state)
+
+def _flatten(state, prefix=''):
+    """Return a dictionary of the values in a state, keyed by their paths
+    (e.g. 'characters.ERIC').
+
+    :param state: The state (or a part of it).
+    :param prefix: The path of the part of the state.
+    """
+    values = {}
+    for key, value in state.items():
+        path = prefix + key
+        if isinstance(value, dict):
+            values.update(_flatten(value, path + '.'))
+        else:
+            values[path] = value
+    return values
+
+def diff_states(state1, state2):
+    """Compare two states of a game, and return a list of 3-tuples,
+    `(path, value1, value2)`, one for each value that differs (ordered by
+    path). A value that is missing from one of the states is `None` in the
+    corresponding tuple.
+
+    :param state1: The first state.
+    :param state2: The second state.
+    """
+    values1 = _flatten(state1)
+    values2 = _flatten(state2)
+    diffs = []
+    for path in sorted(set(values1) | set(values2)):
+        value1 = values1.get(path)
+        value2 = values2.get(path)
+        if value1 != value2:
+            diffs.append((path, value1, value2))
+    return diffs
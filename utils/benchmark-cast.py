@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+import sys
+import os
+import random
+import time
+from argparse import Namespace
+
+# Use the current development version of Pyskool
+PYSKOOL_HOME = os.environ.get('PYSKOOL_HOME')
+if not PYSKOOL_HOME:
+    sys.stderr.write('PYSKOOL_HOME is not set; aborting\n')
+    sys.exit(1)
+if not os.path.isdir(PYSKOOL_HOME):
+    sys.stderr.write('PYSKOOL_HOME=%s: directory not found\n' % PYSKOOL_HOME)
+    sys.exit(1)
+sys.path.insert(0, PYSKOOL_HOME)
+
+from pyskool import version
+from pyskool.game import Game
+
+def parse_args(args):
+    game = 'skool_daze'
+    num_characters = 300
+    num_queries = 10000
+    p_args = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '-g':
+            game = args[i + 1]
+            i += 1
+        elif arg == '-n':
+            num_characters = int(args[i + 1])
+            i += 1
+        elif arg == '-q':
+            num_queries = int(args[i + 1])
+            i += 1
+        elif arg.startswith('-'):
+            print_usage()
+        else:
+            p_args.append(arg)
+        i += 1
+    if len(p_args) != 1:
+        print_usage()
+    return p_args[0], game, num_characters, num_queries
+
+def print_usage():
+    sys.stderr.write("""Usage: {0} [options] DIRECTORY
+
+  Adds extra characters to the cast of a Pyskool game and measures how long
+  it takes to find the characters who can see Eric (as when he misbehaves),
+  first with the position index and spatial index, and then by checking
+  every character and every wall. DIRECTORY must contain the 'images',
+  'sounds' and 'ini' subdirectories (e.g. ~/.pyskool).
+
+Options:
+  -g GAME  Benchmark this game (default: skool_daze)
+  -n N     Add N extra characters to the cast (default: 300)
+  -q N     Run N queries of each type (default: 10000)
+""".format(os.path.basename(sys.argv[0])))
+    sys.exit(1)
+
+def line_of_sight_between(skool, a, b):
+    return not any(wall.separates(a, b) for wall in skool.walls.values())
+
+def get_nearby_characters(cast, character, candidates, witness):
+    x0 = character.x - cast.lines_giving_range[0]
+    x1 = character.x + cast.lines_giving_range[0]
+    y0 = character.y - cast.lines_giving_range[1]
+    y1 = character.y + cast.lines_giving_range[1]
+    nearby_characters = []
+    for c in candidates:
+        if c is not character and x0 <= c.x <= x1 and y0 <= c.y <= y1 and line_of_sight_between(c.skool, c, character):
+            if not witness or c.direction * (character.x - c.x) >= 0:
+                nearby_characters.append(c)
+    return nearby_characters
+
+def get_nearby_adults(cast, character):
+    adults = [c for c in cast.character_list if c.is_adult()]
+    return get_nearby_characters(cast, character, adults, True)
+
+def get_nearby_lines_givers(cast, character):
+    nearby_lines_givers = []
+    for c in get_nearby_characters(cast, character, cast.lines_givers, True):
+        if c.can_give_lines_now():
+            nearby_lines_givers.append(c)
+    return nearby_lines_givers
+
+def get_nearest_lines_recipient(cast, character):
+    lines_recipients = [c for c in cast.character_list if c.can_receive_lines()]
+    candidates = get_nearby_characters(cast, character, lines_recipients, False)
+    if len(candidates) > 0:
+        nearest = candidates[0]
+        for c in candidates[1:]:
+            if abs(c.x - character.x) < abs(nearest.x - character.x):
+                nearest = c
+        return nearest
+
+def place(character, floors):
+    floor = random.choice(floors)
+    character.x = random.randint(floor.left_x, floor.right_x)
+    character.y = floor.y
+    character.direction = random.choice((-1, 1))
+
+def add_characters(game, num_characters):
+    cast = game.cast
+    floors = list(game.skool.floors.values())
+    templates = [c for c in cast.character_list if c is not cast.eric]
+    for n in range(num_characters):
+        template = templates[n % len(templates)]
+        character_id = 'EXTRA%i' % n
+        sprite_group_id = list(cast.sprite_groups)[n % len(cast.sprite_groups)]
+        cast.add_character(character_id, template.name, template.title, sprite_group_id, 'WALK0', 1, template.head_xy, template.flags)
+        character = cast.get(character_id)
+        character.skool = game.skool
+        character.cast = cast
+        place(character, floors)
+    return floors
+
+def run(label, queries, functions):
+    results = []
+    start = time.time()
+    for x, y in queries:
+        target.x, target.y = x, y
+        for f in functions:
+            results.append(f(target))
+    elapsed = time.time() - start
+    sys.stdout.write('{0}: {1:0.3f}s\n'.format(label, elapsed))
+    return elapsed, results
+
+###############################################################################
+# Begin
+###############################################################################
+pyskool_dir, game_name, num_characters, num_queries = parse_args(sys.argv[1:])
+random.seed(0)
+options = Namespace(headless=True, ticks=0, config=[], scale=1, cheat=False, quick_start=True)
+pyskool_ini = os.path.join(PYSKOOL_HOME, 'pyskool', 'data', 'pyskool.ini')
+game = Game(pyskool_ini, os.path.join(pyskool_dir, 'images'),
+            os.path.join(pyskool_dir, 'sounds'), os.path.join(pyskool_dir, 'ini', game_name),
+            options, version, None)
+floors = add_characters(game, num_characters)
+cast = game.cast
+target = cast.eric
+queries = []
+for n in range(num_queries):
+    place(target, floors)
+    queries.append((target.x, target.y))
+sys.stdout.write('Cast: {0} characters; {1} queries of each type\n'.format(len(cast.character_list), num_queries))
+
+indexed_time, indexed_results = run('Indexed', queries, (
+    cast.get_nearby_adults,
+    cast.get_nearby_lines_givers,
+    cast.get_nearest_lines_recipient
+))
+linear_time, linear_results = run('Linear', queries, (
+    lambda c: get_nearby_adults(cast, c),
+    lambda c: get_nearby_lines_givers(cast, c),
+    lambda c: get_nearest_lines_recipient(cast, c)
+))
+if indexed_results != linear_results:
+    sys.stderr.write('ERROR: indexed and linear results differ\n')
+    sys.exit(1)
+sys.stdout.write('Speedup: {0:0.1f}x\n'.format(linear_time / indexed_time))
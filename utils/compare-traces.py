@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+
+# Use the current development version of Pyskool
+PYSKOOL_HOME = os.environ.get('PYSKOOL_HOME')
+if not PYSKOOL_HOME:
+    sys.stderr.write('PYSKOOL_HOME is not set; aborting\n')
+    sys.exit(1)
+if not os.path.isdir(PYSKOOL_HOME):
+    sys.stderr.write('PYSKOOL_HOME=%s: directory not found\n' % PYSKOOL_HOME)
+    sys.exit(1)
+sys.path.insert(0, PYSKOOL_HOME)
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+from pyskool.trace import read_trace, diff_states
+
+def parse_args(args):
+    game = 'skool_daze'
+    homes = [PYSKOOL_HOME, PYSKOOL_HOME]
+    configs = [[], []]
+    seed = 0
+    replay = None
+    ticks = 10000
+    p_args = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('-a', '-b'):
+            configs[arg == '-b'].append(args[i + 1])
+            i += 1
+        elif arg in ('-A', '-B'):
+            homes[arg == '-B'] = os.path.abspath(args[i + 1])
+            i += 1
+        elif arg == '-g':
+            game = args[i + 1]
+            i += 1
+        elif arg == '-r':
+            replay = os.path.abspath(args[i + 1])
+            i += 1
+        elif arg == '-s':
+            seed = int(args[i + 1])
+            i += 1
+        elif arg == '-t':
+            ticks = int(args[i + 1])
+            i += 1
+        elif arg.startswith('-'):
+            print_usage()
+        else:
+            p_args.append(arg)
+        i += 1
+    if len(p_args) != 1:
+        print_usage()
+    return os.path.abspath(p_args[0]), game, homes, configs, seed, replay, ticks
+
+def print_usage():
+    sys.stderr.write("""Usage: {0} [options] DIRECTORY
+
+  Runs two configurations of Pyskool side by side in headless mode from the
+  same seed (or recording), traces the state of each game after every tick,
+  and reports the first tick at which the traces differ. DIRECTORY must
+  contain the 'images', 'sounds' and 'ini' subdirectories (e.g. ~/.pyskool).
+
+  A game run from a seed is traced by trace-game.py, so either configuration
+  may use a copy of Pyskool from before the optimisations that have no switch
+  (for example, a checkout made with 'git worktree add'). Replaying a
+  recording requires copies of Pyskool that support '--replay' and '--trace'.
+
+Options:
+  -a P,V   Set parameter P to value V in configuration A (may be used more
+           than once)
+  -A DIR   Run configuration A from this copy of Pyskool (default:
+           $PYSKOOL_HOME)
+  -b P,V   Set parameter P to value V in configuration B (may be used more
+           than once)
+  -B DIR   Run configuration B from this copy of Pyskool (default:
+           $PYSKOOL_HOME)
+  -g GAME  Run this game (default: skool_daze)
+  -r FILE  Replay this recording instead of running a game from a seed
+  -s SEED  Seed the random number generator with SEED (default: 0)
+  -t N     Stop after N ticks (default: 10000)
+""".format(os.path.basename(sys.argv[0])))
+    sys.exit(1)
+
+def start(label, home, config, trace_file):
+    if replay:
+        cmd = [sys.executable, os.path.join(home, 'pyskool.py'), '-i', os.path.join('ini', game_name), '--ticks', str(ticks), '--trace', trace_file, '--replay', replay]
+        for param in config:
+            cmd.extend(('--config', param))
+    else:
+        # Run the game with trace-game.py, which works with versions of Pyskool
+        # that have no '--headless', '--seed' or '--trace' option
+        cmd = [sys.executable, os.path.join(UTILS_DIR, 'trace-game.py'), '-g', game_name, '-s', str(seed), '-t', str(ticks)]
+        for param in config:
+            cmd.extend(('-c', param))
+        cmd.extend((pyskool_dir, trace_file))
+    env = dict(os.environ)
+    env['PYSKOOL_HOME'] = home
+    # Make the iteration order of sets and dictionaries the same in both games
+    env['PYTHONHASHSEED'] = '0'
+    sys.stdout.write('{0}: {1}\n'.format(label, ' '.join(cmd)))
+    log = open(os.path.join(tmp_dir, label + '.log'), 'w+')
+    return subprocess.Popen(cmd, cwd=pyskool_dir, env=env, stdout=log, stderr=subprocess.STDOUT), log
+
+def wait(label, process, log):
+    process.wait()
+    log.seek(0)
+    output = log.read().splitlines()
+    log.close()
+    if process.returncode:
+        sys.stderr.write('ERROR: configuration {0} failed:\n{1}\n'.format(label, '\n'.join(output)))
+        sys.exit(1)
+    for line in output:
+        if line.startswith(('Ran ', 'Traced ')):
+            sys.stdout.write('{0}: {1}\n'.format(label, line))
+
+def compare(trace_a, trace_b):
+    traces = (read_trace(trace_a), read_trace(trace_b))
+    tick = 0
+    while True:
+        entries = [next(trace, None) for trace in traces]
+        if entries[0] is None or entries[1] is None:
+            break
+        tick, digest_a, state_a = entries[0]
+        digest_b, state_b = entries[1][1:]
+        if digest_a != digest_b:
+            sys.stdout.write('First difference at tick {0}:\n'.format(tick))
+            for path, value_a, value_b in diff_states(state_a, state_b):
+                sys.stdout.write('  {0}\n    A: {1}\n    B: {2}\n'.format(path, value_a, value_b))
+            return False
+    for label, entry in zip('AB', entries):
+        if entry:
+            sys.stdout.write('Traces match for {0} ticks, but configuration {1} ran for longer\n'.format(tick, label))
+            return False
+    sys.stdout.write('Traces match for {0} ticks\n'.format(tick))
+    return True
+
+###############################################################################
+# Begin
+###############################################################################
+pyskool_dir, game_name, homes, configs, seed, replay, ticks = parse_args(sys.argv[1:])
+tmp_dir = tempfile.mkdtemp()
+try:
+    trace_files = [os.path.join(tmp_dir, label + '.trace') for label in 'AB']
+    processes = [start(label, home, config, trace_file) for label, home, config, trace_file in zip('AB', homes, configs, trace_files)]
+    for label, (process, log) in zip('AB', processes):
+        wait(label, process, log)
+    matched = compare(*trace_files)
+finally:
+    shutil.rmtree(tmp_dir)
+if not matched:
+    sys.exit(1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+import sys
+import os
+import hashlib
+import json
+import random
+from argparse import Namespace
+from collections import defaultdict
+
+# Use the version of Pyskool being traced
+PYSKOOL_HOME = os.environ.get('PYSKOOL_HOME')
+if not PYSKOOL_HOME:
+    sys.stderr.write('PYSKOOL_HOME is not set; aborting\n')
+    sys.exit(1)
+if not os.path.isdir(PYSKOOL_HOME):
+    sys.stderr.write('PYSKOOL_HOME=%s: directory not found\n' % PYSKOOL_HOME)
+    sys.exit(1)
+sys.path.insert(0, PYSKOOL_HOME)
+
+# Make the iteration order of sets and dictionaries the same in every run
+if os.environ.get('PYTHONHASHSEED') != '0':
+    os.environ['PYTHONHASHSEED'] = '0'
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+# Make sure SDL neither opens a window nor uses the sound card
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+from pyskool import version
+from pyskool.game import Game
+from pyskool.input import Keyboard
+from pyskool.sound import Beeper
+
+def parse_args(args):
+    game = 'skool_daze'
+    config = []
+    seed = 0
+    ticks = 10000
+    p_args = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '-c':
+            config.append(args[i + 1])
+            i += 1
+        elif arg == '-g':
+            game = args[i + 1]
+            i += 1
+        elif arg == '-s':
+            seed = int(args[i + 1])
+            i += 1
+        elif arg == '-t':
+            ticks = int(args[i + 1])
+            i += 1
+        elif arg.startswith('-'):
+            print_usage()
+        else:
+            p_args.append(arg)
+        i += 1
+    if len(p_args) != 2:
+        print_usage()
+    return p_args[0], p_args[1], game, config, seed, ticks
+
+def print_usage():
+    sys.stderr.write("""Usage: {0} [options] DIRECTORY FILE
+
+  Runs a game in the copy of Pyskool at $PYSKOOL_HOME without a display or
+  sound, from a seed, and writes a trace of the state of the game after every
+  tick to FILE, in the same format as the '--trace' option. Unlike that
+  option, this works with any version of Pyskool (including those that have
+  no '--headless', '--seed' or '--trace' option), so that the traces of a
+  version from before an optimisation was made can be compared with those of
+  a later version. DIRECTORY must contain the 'images', 'sounds' and 'ini'
+  subdirectories (e.g. ~/.pyskool).
+
+Options:
+  -c P,V   Set parameter P to value V (may be used more than once)
+  -g GAME  Run this game (default: skool_daze)
+  -s SEED  Seed the random number generator with SEED (default: 0)
+  -t N     Stop after N ticks (default: 10000)
+""".format(os.path.basename(sys.argv[0])))
+    sys.exit(1)
+
+# This must produce the same state as pyskool.trace.get_state() in the current
+# version of Pyskool
+def get_state(skool):
+    characters = {}
+    for movable in skool.cast.movables:
+        stack = movable.command_list.stack
+        command = stack[-1].__class__.__name__ if stack else None
+        characters[movable.character_id] = [movable.x, movable.y, movable.direction, movable.animatory_state, command]
+    scoreboard = skool.scoreboard
+    timetable = skool.timetable
+    return {
+        'characters': characters,
+        'doors': dict((door_id, door.shut) for door_id, door in skool.doors.items()),
+        'windows': dict((window_id, window.shut) for window_id, window in skool.windows.items()),
+        'score': [scoreboard.score, scoreboard.lines, scoreboard.hiscore],
+        'timetable': [timetable.index, timetable.lesson_id, timetable.counter]
+    }
+
+class Clock:
+    # Never wait, and draw every frame
+    dropped = 0
+
+    def tick(self, framerate=0):
+        return 0
+
+    def frame_due(self, *args):
+        return True
+
+def load_sound(self, sound_id, sound_file):
+    # Load no sound effects, so that none is ever busy
+    return
+
+def pump(self):
+    # Nobody is pressing any keys
+    self.key_down_events = []
+    self.quit = False
+    self.pressed_keys = defaultdict(int)
+
+def run(game, ticks, trace_file):
+    game.clock = Clock()
+    game.paused = False
+    game.scroll = 0
+    skool = game.skool
+    tick = 0
+    with open(trace_file, 'w') as f:
+        while tick < ticks and not skool.game_over:
+            if not game.quick_start:
+                skool.scroll_on(game.clock)
+                game.quick_start = True
+            if game._main_loop():
+                break
+            tick += 1
+            state = json.dumps(get_state(skool), sort_keys=True, separators=(',', ':'))
+            digest = hashlib.md5(state.encode('utf-8')).hexdigest()
+            f.write('%i %s %s\n' % (tick, digest, state))
+    sys.stdout.write('Traced {0} ticks to {1}\n'.format(tick, trace_file))
+
+###############################################################################
+# Begin
+###############################################################################
+pyskool_dir, trace_file, game_name, config, seed, ticks = parse_args(sys.argv[1:])
+trace_file = os.path.abspath(trace_file)
+os.chdir(pyskool_dir)
+Beeper._load_sound = load_sound
+Keyboard.pump = pump
+random.seed(seed)
+options = Namespace(headless=True, ticks=ticks, config=config, scale=None, cheat=False, quick_start=False, seed=seed)
+pyskool_ini = os.path.join(PYSKOOL_HOME, 'pyskool', 'data', 'pyskool.ini')
+game = Game(pyskool_ini, os.path.join(pyskool_dir, 'images'),
+            os.path.join(pyskool_dir, 'sounds'), os.path.join(pyskool_dir, 'ini', game_name),
+            options, version, None)
+run(game, ticks, trace_file)